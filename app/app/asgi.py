@@ -10,7 +10,18 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# Serve settings.ASYNC_VIEWS as async views, see core/aio.py.
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Load the URLconf before gunicorn forks the workers, see app/wsgi.py.
+get_resolver().url_patterns
+
+# Rental event streams are served next to Django, see core/events.py.
+from core.events import EventStreamApp  # noqa: E402
+
+application = EventStreamApp(application)
@@ -34,6 +34,11 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.TracingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.TrafficCaptureMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # <-- for CORS
@@ -70,7 +75,7 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'core.db.backends.postgresql',
             'HOST': os.environ.get('DB_HOST'),
             'NAME': os.environ.get('DB_NAME'),
             'USER': os.environ.get('DB_USER'),
@@ -81,6 +86,40 @@ DATABASES = {
 db_url = os.environ.get('DATABASE_URL')
 if db_url:
     DATABASES['default'] = dj_database_url.parse(db_url)
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES['default']['ENGINE'] = 'core.db.backends.postgresql'
+
+# Read replicas, as comma separated database URLs, see core/db/routers.py.
+DATABASE_REPLICAS = []
+for i, url in enumerate(filter(None, os.environ.get(
+        'DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{i}'
+    DATABASES[alias] = dj_database_url.parse(url)
+    if DATABASES[alias]['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES[alias]['ENGINE'] = 'core.db.backends.postgresql'
+    # Tests read the test database through the replica aliases.
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Connection management, see core/db/backends/postgresql/base.py.
+# With DB_POOL_SIZE set, every request hands its connection back to the
+# per-process pool instead of keeping one per thread. DB_PGBOUNCER marks
+# a pgbouncer in transaction mode in front of Postgres, which cannot keep
+# server-side cursors across transactions.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+for config in DATABASES.values():
+    config.update({
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else int(
+            os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': bool(int(
+            os.environ.get('DB_PGBOUNCER', 0))),
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
+    })
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -143,6 +182,10 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
@@ -159,9 +202,169 @@ SIMPLE_JWT = {
 }
 
 
+# Idempotency-Key replay window, how long a duplicate waits for the
+# original request before getting a 409, and after how long a key still
+# in progress is taken to be abandoned by a killed worker and claimed
+# again. The lease defaults to the gunicorn WEB_TIMEOUT, past which no
+# request is still running.
+IDEMPOTENCY_KEY_TTL = timedelta(
+    hours=int(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+)
+IDEMPOTENCY_LOCK_TIMEOUT = float(
+    os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 5)
+)
+IDEMPOTENCY_LOCK_LEASE = timedelta(seconds=int(
+    os.environ.get('IDEMPOTENCY_LOCK_LEASE_SECONDS', os.environ.get(
+        'WEB_TIMEOUT', 30))
+))
+
+# `/api/sync/` change log (see core.sync): how long changes are kept for
+# `manage.py purge_changes`, how old a change must be before tokens move
+# past it (except on Postgres, which uses transaction snapshots), and the
+# most changes one sync returns.
+SYNC_RETENTION = timedelta(
+    days=int(os.environ.get('SYNC_RETENTION_DAYS', 30))
+)
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', 5))
+SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES', 500))
+
+# Rental event streams, served under ASGI at EVENTS_PATH (see core.events).
+# EVENTS_BROKER is `postgres` (LISTEN/NOTIFY) or `local` (this process
+# only), by default `postgres` on Postgres. Each stream keeps at most
+# EVENTS_QUEUE_SIZE undelivered events and lasts EVENTS_MAX_SECONDS.
+EVENTS_PATH = '/api/rental/events/'
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', '')
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 64))
+EVENTS_MAX_CONNECTIONS = int(os.environ.get('EVENTS_MAX_CONNECTIONS', 1000))
+EVENTS_MAX_SECONDS = float(os.environ.get('EVENTS_MAX_SECONDS', 300))
+EVENTS_KEEPALIVE_SECONDS = float(
+    os.environ.get('EVENTS_KEEPALIVE_SECONDS', 15))
+EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 3000))
+
+
+# Requests slower than this, or issuing at least this many queries, are
+# logged by core.middleware.RequestTimingMiddleware.
+REQUEST_TIMING_SLOW_MS = float(os.environ.get('REQUEST_TIMING_SLOW_MS', 500))
+REQUEST_TIMING_SLOW_QUERIES = int(
+    os.environ.get('REQUEST_TIMING_SLOW_QUERIES', 50)
+)
+
+# Response compression (see core.compression): brotli when installed and
+# accepted, gzip otherwise, for bodies of at least COMPRESSION_MIN_BYTES.
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)
+)
+COMPRESSION_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/vnd.oai.openapi',
+    'application/yaml',
+    'text/',
+)
+
+
+# Bearer token required to scrape /metrics; unset, scrapes are refused.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+# On-demand request profiling (see core.profiling).
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_MAX_PER_MINUTE = int(os.environ.get('PROFILE_MAX_PER_MINUTE', 6))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/profiles')
+
+
+# Span tracing (see core.tracing).
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0))
+TRACING_EXPORT_PATH = os.environ.get(
+    'TRACING_EXPORT_PATH', '/tmp/traces/spans.jsonl'
+)
+TRACING_SERVICE_NAME = os.environ.get('TRACING_SERVICE_NAME', 'bookshare')
+TRACING_MAX_SPANS = 512
+TRACING_QUEUE_SIZE = 10000
+TRACING_BATCH_SIZE = 512
+TRACING_EXPORT_INTERVAL = 1.0
+
+
+# Sampled traffic capture for replay (see core.traffic).
+TRAFFIC_CAPTURE_RATE = float(os.environ.get('TRAFFIC_CAPTURE_RATE', 0))
+TRAFFIC_CAPTURE_DIR = os.environ.get('TRAFFIC_CAPTURE_DIR', '/tmp/traffic')
+TRAFFIC_CAPTURE_BUCKETS = 1000
+TRAFFIC_CAPTURE_MAX_BYTES = 64 * 1024 * 1024
+TRAFFIC_CAPTURE_BACKUPS = 5
+
+# Under ASGI (app/asgi.py sets ASYNC_VIEWS=1) the views below are served
+# as async views on the named thread pool, see core/aio.py. The pool sizes
+# bound the threads and database connections of each worker.
+ASYNC_VIEWS_ENABLED = os.environ.get('ASYNC_VIEWS') == '1'
+ASYNC_VIEWS = {
+    'BookViewSet.list': 'db',
+    'BookViewSet.retrieve': 'db',
+    'BookViewSet.batch': 'db',
+    'RentalViewSet.mine': 'db',
+    'BookViewSet.upload_image': 'storage',
+}
+ASYNC_THREADS = {
+    'db': int(os.environ.get('ASYNC_DB_THREADS', 8)),
+    'storage': int(os.environ.get('ASYNC_STORAGE_THREADS', 4)),
+}
+
+# Page size of OptInPagination lists, which are only paginated on
+# `?limit=` requests (see core/pagination.py). OPT_IN_MAX_PAGE_SIZE also
+# caps the rows of `?expand=` arrays.
+OPT_IN_PAGE_SIZE = int(os.environ.get('OPT_IN_PAGE_SIZE', 20))
+OPT_IN_MAX_PAGE_SIZE = int(os.environ.get('OPT_IN_MAX_PAGE_SIZE', 100))
+
+# Most books one `/api/book/books/batch/` request may ask for.
+BOOK_BATCH_MAX_IDS = int(os.environ.get('BOOK_BATCH_MAX_IDS', 200))
+
+# List actions serialized from values_list() rows rather than model
+# instances, see core/values.py.
+VALUES_SERIALIZER_VIEWS = {
+    'BookViewSet.list',
+    'RentalViewSet.mine',
+}
+
+# Views whose GET requests may read from DATABASE_REPLICAS, and how long a
+# client stays on the primary after a write. POSTs to READ_ONLY_POST_VIEWS
+# only read, such as a batch lookup too long for a query string, so they
+# do not count as writes and may read from a replica too. Pins are kept in
+# a cache table on the primary (`manage.py createcachetable`) so that every
+# worker on every host sees them.
+REPLICA_READ_VIEWS = {
+    'BookViewSet.list',
+    'BookViewSet.retrieve',
+    'BookViewSet.batch',
+    'RentalViewSet.mine',
+    'SchemaView.get',
+}
+READ_ONLY_POST_VIEWS = {
+    'BookViewSet.batch',
+}
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'replica_pins': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'replica_pins',
+    },
+}
+
+
 # ✅ CORS Settings (if you're using frontend or Postman)
 CORS_ALLOW_ALL_ORIGINS = True
+# Lets browsers follow the next link of capped `?expand=` lists.
+CORS_EXPOSE_HEADERS = ['Link']
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# Version of the deployed code, e.g. the git SHA the image was built from.
+# Rendered OpenAPI schemas are kept per version in SCHEMA_CACHE_DIR (see
+# core.schema); without it each worker renders them once in memory.
+APP_VERSION = os.environ.get('APP_VERSION', '')
+SCHEMA_CACHE_DIR = os.environ.get('SCHEMA_CACHE_DIR', '/tmp/schema')
@@ -3,10 +3,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from core import views as core_views
+from core.aio import async_urlpatterns
+from core.schema import SchemaView
+from core.sync import SyncView
+
+from drf_spectacular.views import SpectacularSwaggerView
 
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -15,7 +17,8 @@ from rest_framework_simplejwt.views import (
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('metrics', core_views.metrics, name='metrics'),
+    path('api/schema/', SchemaView.as_view(), name='api-schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(
         url_name='api-schema'
     ), name='api-docs'),
@@ -33,9 +36,12 @@ urlpatterns = [
     # App Endpoints
     path('api/user/', include('user.urls')),
     path('api/book/', include('book.urls')),
-    path('api/rental/', include('rental.urls'))
+    path('api/rental/', include('rental.urls')),
+    path('api/sync/', SyncView.as_view(), name='sync'),
 ]
 
+async_urlpatterns(urlpatterns)
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
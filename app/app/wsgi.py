@@ -10,7 +10,13 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf, and with it every view and serializer, here rather
+# than on the first request: with gunicorn's preload_app the workers are
+# forked with it loaded.
+get_resolver().url_patterns
@@ -1,12 +1,17 @@
 """
 Serializers for the book API.
 """
+from django.conf import settings
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetMixin
+from core.instrumentation import TimedSerializerMixin
 from core.models import Book
 from user.serializers import UserPublicSerializer
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(
+        SparseFieldsetMixin, TimedSerializerMixin,
+        serializers.ModelSerializer):
     """Serializer for book objects."""
     owner = UserPublicSerializer(read_only=True)
 
@@ -19,6 +24,20 @@ class BookSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'owner']
 
 
+class BookSummarySerializer(
+        SparseFieldsetMixin, TimedSerializerMixin,
+        serializers.ModelSerializer):
+    """Serializer for books embedded in other objects."""
+
+    class Meta:
+        model = Book
+        fields = ['id', 'title', 'author', 'image']
+        read_only_fields = fields
+        expandable_fields = {
+            'owner': UserPublicSerializer,
+        }
+
+
 class BookImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to books."""
 
@@ -29,3 +48,19 @@ class BookImageSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'image': {'required': True}
         }
+
+
+class BookBatchSerializer(serializers.Serializer):
+    """Serializer for the ids of a batch retrieve."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+
+    def validate_ids(self, value):
+        """Drop repeated ids and bound the batch size."""
+        ids = list(dict.fromkeys(value))
+        if len(ids) > settings.BOOK_BATCH_MAX_IDS:
+            raise serializers.ValidationError(
+                f'At most {settings.BOOK_BATCH_MAX_IDS} ids per request.')
+        return ids
@@ -5,7 +5,7 @@ import os
 import tempfile
 
 from PIL import Image
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -18,6 +18,7 @@ from book.serializers import BookSerializer
 
 BOOKS_URL = reverse('book:book-list')
 MY_BOOKS_URL = reverse('book:book-mine')
+BATCH_URL = reverse('book:book-batch')
 TOKEN_URL = reverse('user:login')
 CREATE_USER_URL = reverse('user:create')
 
@@ -93,6 +94,47 @@ class PublicBookApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_batch_retrieve_books(self):
+        """Test retrieving books by id in request order, in one query"""
+        user = create_user(email='user@example.com', password='testpass')
+        first = create_book(user, title='Book 1')
+        second = create_book(user, title='Book 2', is_available=False)
+        missing = second.id + 100
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                BATCH_URL, {'ids': f'{second.id},{missing},{first.id}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            BookSerializer([second, first], many=True).data,
+        )
+        self.assertEqual(res.data['missing'], [missing])
+
+    def test_batch_retrieve_books_post(self):
+        """Test the POST form, with repeated ids returned once"""
+        user = create_user(email='user@example.com', password='testpass')
+        book = create_book(user)
+
+        res = self.client.post(
+            BATCH_URL, {'ids': [book.id, book.id]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [book.id])
+        self.assertEqual(res.data['missing'], [])
+
+    @override_settings(BOOK_BATCH_MAX_IDS=2)
+    def test_batch_retrieve_books_invalid(self):
+        """Test missing, malformed and too many ids are rejected"""
+        for params in ({}, {'ids': '1,x'}, {'ids': '1,2,3'}):
+            res = self.client.get(BATCH_URL, params)
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn('ids', res.data)
+
     def test_create_book_unauthorized(self):
         """Test that authentication is required to create a book"""
         payload = {
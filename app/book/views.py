@@ -5,6 +5,12 @@ Views for the book API.
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.fieldsets import SparseFieldsetViewMixin
+from core.idempotency import idempotent
+from core.metrics import IMAGE_UPLOAD_BYTES
+from core.profiling import ProfiledViewMixin
+from core.tracing import TracedViewMixin, traced
+from core.values import ValuesSerializerViewMixin
 from core.models import Book
 from book import serializers
 
@@ -18,9 +24,11 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.owner == request.user
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+        SparseFieldsetViewMixin, ValuesSerializerViewMixin, TracedViewMixin,
+        ProfiledViewMixin, viewsets.ModelViewSet):
     """Manage books in the database."""
-    queryset = Book.objects.all()
+    queryset = Book.objects.select_related('owner')
     serializer_class = serializers.BookSerializer
 
     def get_permissions(self):
@@ -32,13 +40,15 @@ class BookViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), IsOwnerOrReadOnly()]
         return [permissions.AllowAny()]
 
+    @traced('queryset')
     def get_queryset(self):
         """Filter books based on action."""
         if self.action == 'mine':
             return self.queryset.filter(
                 owner=self.request.user).order_by('-id')
         if self.action == 'list':
-            return self.queryset.order_by('-id')
+            return self.queryset.filter(
+                is_available=True).order_by('-id')
         return self.queryset
 
     def get_serializer_class(self):
@@ -47,6 +57,11 @@ class BookViewSet(viewsets.ModelViewSet):
             return serializers.BookImageSerializer
         return self.serializer_class
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Create a book, replaying the response for a repeated key."""
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Attach the authenticated user as the book owner."""
         serializer.save(owner=self.request.user)
@@ -54,10 +69,33 @@ class BookViewSet(viewsets.ModelViewSet):
     @action(methods=['GET'], detail=False, url_path='mine')
     def mine(self, request):
         """Retrieve books for the authenticated user."""
-        books = self.get_queryset()
+        books = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(books, many=True)
         return Response(serializer.data)
 
+    @action(methods=['GET', 'POST'], detail=False, url_path='batch')
+    def batch(self, request):
+        """
+        Retrieve books by id, in the order requested: `?ids=1,2,3`, or a
+        POST of {"ids": [...]} for long lists.
+        """
+        if request.method == 'POST':
+            data = request.data
+        else:
+            ids = request.query_params.get('ids')
+            data = {'ids': ids.split(',')} if ids else {}
+        batch = serializers.BookBatchSerializer(data=data)
+        batch.is_valid(raise_exception=True)
+        ids = batch.validated_data['ids']
+
+        books = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer(
+            [books[pk] for pk in ids if pk in books], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in books],
+        })
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to a book."""
@@ -68,6 +106,7 @@ class BookViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
+            IMAGE_UPLOAD_BYTES.observe(serializer.validated_data['image'].size)
             serializer.save()
             return Response(
                 serializer.data,
@@ -0,0 +1,112 @@
+"""
+Async serving of selected views under ASGI.
+
+Django 3.2 runs every sync view and sync middleware of an ASGI request on
+one shared thread, so a uvicorn worker serves one request at a time.
+With ASYNC_VIEWS_ENABLED (set by app/asgi.py) the views named in
+ASYNC_VIEWS are instead awaited on bounded thread pools: the event loop
+stays free while a request waits on the database or S3, and the pool
+sizes cap the threads and database connections per worker.
+"""
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+_executors = {}
+
+
+def executor(name):
+    """Return the ASYNC_THREADS[name] sized thread pool."""
+    pool = _executors.get(name)
+    if pool is None:
+        pool = _executors[name] = ThreadPoolExecutor(
+            settings.ASYNC_THREADS[name],
+            thread_name_prefix=f'async-{name}',
+        )
+    return pool
+
+
+def _in_thread(func, *args, **kwargs):
+    """
+    Call `func` on a pool thread, closing stale connections around it
+    as Django does around each request on a request thread.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def close_connections():
+    """
+    Close the database connections of every pool thread. Django only
+    closes those of its own threads, so tests call this before the test
+    database is dropped.
+    """
+    for pool in _executors.values():
+        # Waiting on the barrier keeps each call on a thread of its own.
+        size = pool._max_workers
+        barrier = threading.Barrier(size)
+
+        def close():
+            barrier.wait(5)
+            connections.close_all()
+
+        for future in [pool.submit(close) for _ in range(size)]:
+            future.result()
+
+
+async def run_sync(func, *args, pool='db', **kwargs):
+    """Await the sync `func` on the named thread pool."""
+    return await sync_to_async(
+        _in_thread, thread_sensitive=False, executor=executor(pool),
+    )(func, *args, **kwargs)
+
+
+def async_view(view):
+    """
+    Wrap a sync view so that ASGI awaits it on a pool thread.
+
+    The pool is the ASYNC_VIEWS entry of the request's action, `db` for
+    actions not listed there.
+    """
+    cls = view.cls
+    actions = getattr(view, 'actions', None) or {}
+
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        action = actions.get(request.method.lower(), request.method.lower())
+        pool = settings.ASYNC_VIEWS.get(f'{cls.__name__}.{action}', 'db')
+        return await run_sync(render, request, *args, pool=pool, **kwargs)
+    return wrapper
+
+
+def async_urlpatterns(patterns):
+    """
+    Make the views with an action listed in ASYNC_VIEWS async, in place.
+    """
+    if not settings.ASYNC_VIEWS_ENABLED:
+        return patterns
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            async_urlpatterns(pattern.url_patterns)
+            continue
+        cls = getattr(pattern.callback, 'cls', None)
+        actions = getattr(pattern.callback, 'actions', None) or {}
+        if cls is not None and any(
+            f'{cls.__name__}.{action}' in settings.ASYNC_VIEWS
+            for action in actions.values()
+        ):
+            pattern.callback = async_view(pattern.callback)
+    return patterns
@@ -1,6 +1,35 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+
+def install_query_hooks(sender, connection, **kwargs):
+    """
+    Count and trace the SQL of every connection for the current request.
+
+    The hooks look the request up in context variables, so they also
+    see queries run on threads other than the one serving the request,
+    as async views do (see core.aio).
+    """
+    from core import instrumentation, tracing
+
+    for hook in (instrumentation.record_query, tracing.record_query):
+        if hook not in connection.execute_wrappers:
+            connection.execute_wrappers.append(hook)
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        connection_created.connect(install_query_hooks)
+
+        from core import sync
+        from core.models import Book, Rental
+
+        for model, receiver in (
+            (Book, sync.book_changed), (Rental, sync.rental_changed),
+        ):
+            post_save.connect(receiver, sender=model)
+            post_delete.connect(receiver, sender=model)
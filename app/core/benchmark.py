@@ -0,0 +1,183 @@
+"""
+HTTP load generator for the REST API.
+
+Drives a weighted mix of the main endpoints from several threads against a
+running server seeded with `manage.py seed_scale`, and summarizes latency
+percentiles and throughput per endpoint.
+"""
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from core.management.commands.seed_scale import EMAIL_TEMPLATE, PASSWORD
+
+# (operation, weight)
+MIX = [
+    ('book_list', 30),
+    ('book_detail', 25),
+    ('book_mine', 10),
+    ('rental_mine', 15),
+    ('rental_flow', 10),
+    ('login', 10),
+]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not samples:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(samples)))
+    return samples[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    """Build the JSON report from per-endpoint latencies in seconds."""
+    endpoints = {}
+    for name in sorted(latencies):
+        samples = sorted(latencies[name])
+        endpoints[name] = {
+            'count': len(samples),
+            'errors': errors.get(name, 0),
+            'rps': round(len(samples) / elapsed, 2),
+            **{
+                f'p{pct}_ms': round(percentile(samples, pct) * 1000, 2)
+                for pct in (50, 95, 99)
+            },
+        }
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'rps': round(total / elapsed, 2) if elapsed else 0,
+        'endpoints': endpoints,
+    }
+
+
+class LoadRunner:
+    """Run the endpoint mix against `base_url` with seeded users."""
+
+    def __init__(self, base_url, users, seed=0):
+        self.base_url = base_url.rstrip('/')
+        self.users = users
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.tokens = {}
+        self.book_ids = []
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def call(self, name, method, path, token=None, **kwargs):
+        """Send one timed request; return the response or None."""
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        start = time.perf_counter()
+        try:
+            res = self.session().request(
+                method, self.base_url + path, headers=headers, timeout=30,
+                **kwargs)
+        except requests.RequestException:
+            res = None
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            if res is None or res.status_code >= 500:
+                self.errors[name] += 1
+        return res
+
+    def login(self, email, name='login'):
+        res = self.call(name, 'POST', '/api/user/login/',
+                        data={'email': email, 'password': PASSWORD})
+        if res is not None and res.status_code == 200:
+            self.tokens[email] = res.json()['access']
+        return self.tokens.get(email)
+
+    def token(self, email):
+        return self.tokens.get(email) or self.login(email, 'login_setup')
+
+    def random_email(self, rng):
+        return EMAIL_TEMPLATE.format(rng.randrange(self.users))
+
+    def prepare(self):
+        res = self.call('book_list', 'GET', '/api/book/books/')
+        if res is None or res.status_code != 200:
+            raise RuntimeError(f'Cannot list books at {self.base_url}.')
+        self.book_ids = [book['id'] for book in res.json()]
+        if not self.book_ids:
+            raise RuntimeError('No books; run manage.py seed_scale first.')
+
+    def rental_flow(self, rng):
+        """Request a book as a renter, accept as owner, then return it."""
+        book_id = rng.choice(self.book_ids)
+        res = self.call('book_detail', 'GET', f'/api/book/books/{book_id}/')
+        if res is None or res.status_code != 200:
+            return
+        owner = res.json()['owner']['email']
+        renter = self.random_email(rng)
+        if renter == owner:
+            return
+        res = self.call('rental_create', 'POST', '/api/rental/rentals/',
+                        self.token(renter), data={'book': book_id})
+        if res is None or res.status_code != 201:
+            return
+        rental_id = res.json()['id']
+        res = self.call('rental_accept', 'POST',
+                        f'/api/rental/rentals/{rental_id}/accept/',
+                        self.token(owner))
+        if res is None or res.status_code != 200:
+            return
+        self.call('rental_return', 'POST',
+                  f'/api/rental/rentals/{rental_id}/return/',
+                  self.token(renter))
+
+    def step(self, rng):
+        operation = rng.choices(*zip(*MIX))[0]
+        email = self.random_email(rng)
+        if operation == 'book_list':
+            self.call('book_list', 'GET', '/api/book/books/')
+        elif operation == 'book_detail':
+            book_id = rng.choice(self.book_ids)
+            self.call('book_detail', 'GET', f'/api/book/books/{book_id}/')
+        elif operation == 'book_mine':
+            self.call('book_mine', 'GET', '/api/book/books/mine/',
+                      self.token(email))
+        elif operation == 'rental_mine':
+            self.call('rental_mine', 'GET', '/api/rental/rentals/mine/',
+                      self.token(email))
+        elif operation == 'rental_flow':
+            self.rental_flow(rng)
+        else:
+            self.login(email)
+
+    def worker(self, seed, deadline):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            self.step(rng)
+
+    def run(self, concurrency, duration):
+        """Run for `duration` seconds and return the report."""
+        self.prepare()
+        self.latencies.clear()
+        self.errors.clear()
+        start = time.monotonic()
+        deadline = start + duration
+        with ThreadPoolExecutor(concurrency) as pool:
+            futures = [
+                pool.submit(self.worker, self.rng.random(), deadline)
+                for _ in range(concurrency)
+            ]
+            for future in futures:
+                future.result()
+        self.latencies.pop('login_setup', None)
+        self.errors.pop('login_setup', None)
+        return summarize(
+            self.latencies, self.errors, time.monotonic() - start)
@@ -0,0 +1,76 @@
+"""
+Response body compression for CompressionMiddleware.
+
+Brotli is used when the brotli package is installed and the client
+accepts it, gzip otherwise. Streamed bodies are compressed chunk by chunk
+with a flush after each one, so a client receives every chunk as soon as
+the view produces it.
+"""
+import gzip
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """
+    Return the encoding of ENCODINGS the Accept-Encoding header prefers,
+    or None. Ties go to the first of ENCODINGS.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressible(content_type):
+    return content_type.split(';')[0].strip().startswith(
+        settings.COMPRESSION_TYPES)
+
+
+def compress(encoding, data):
+    """Compress `data` in one go."""
+    if encoding == 'br':
+        return brotli.compress(
+            data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(
+        data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(encoding, chunks):
+    """Compress an iterable of byte chunks, flushing after each one."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer.
+    compressor = zlib.compressobj(
+        settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,104 @@
+"""
+PostgreSQL backend with connection health checks and optional pooling.
+
+Adds to Django's backend, driven by extra keys in the DATABASES entry:
+
+- CONN_HEALTH_CHECKS: a persistent connection (CONN_MAX_AGE > 0) is
+  checked with `SELECT 1` the first time it is used in each request and
+  replaced if the server dropped it, instead of failing that request.
+- POOL: {'MAX_SIZE': n, 'TIMEOUT': seconds} keeps up to n connections per
+  process in a shared pool (see core.db.pool) for threaded workers.
+"""
+from functools import partial
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import PoolTimeout, get_pool
+from core.metrics import DB_CONNECTIONS_OPENED, DB_RECONNECTS
+
+Database = base.Database
+
+
+def usable(conn, ping=False):
+    """Whether an idle psycopg2 connection can be handed out again."""
+    if conn.closed:
+        return False
+    status = conn.get_transaction_status()
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        return False
+    if not ping:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict, partial(
+            usable, ping=self.settings_dict.get('CONN_HEALTH_CHECKS', False)))
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            DB_CONNECTIONS_OPENED.labels(self.alias).inc()
+            return super().get_new_connection(conn_params)
+        connect = super().get_new_connection
+        try:
+            connection = pool.get(lambda: connect(conn_params))
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def connect(self):
+        # New and pooled connections were just checked. Set first, as
+        # connecting turns autocommit on through ensure_connection(), and a
+        # check there would leave the new connection inside a transaction.
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and not self.in_atomic_block
+            and self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                DB_RECONNECTS.labels(self.alias).inc()
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        # Called by Django when a request starts and finishes; the next
+        # use of the connection checks it again.
+        self.health_check_done = True
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # A connection closed inside atomic() stays referenced by this
+        # wrapper, so it must not be handed to another thread.
+        discard = self.in_atomic_block or self.errors_occurred
+        if not discard and self.connection.get_transaction_status() != (
+            extensions.TRANSACTION_STATUS_IDLE
+        ):
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                discard = True
+        pool.put(self.connection, discard=discard or self.connection.closed)
@@ -0,0 +1,31 @@
+"""
+Migration operations for online schema changes.
+"""
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently as PostgresAddIndexConcurrently,
+)
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    """
+    Build an index without blocking writes on PostgreSQL, and as a plain
+    AddIndex elsewhere, as in tests on SQLite. The migration must not be
+    atomic.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state)
+        return super().database_forwards(
+            app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state)
+        return super().database_backwards(
+            app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,114 @@
+"""
+In-process database connection pool.
+
+Each process keeps at most `max_size` connections per database alias;
+threads of a threaded gunicorn worker check one out when Django opens a
+connection and give it back when Django closes it, so a request never pays
+for connection (and TLS) setup while an idle connection is available.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from core.metrics import (
+    DB_CONNECTIONS_OPENED,
+    DB_POOL_CHECKOUTS,
+    DB_POOL_WAIT_SECONDS,
+    DB_RECONNECTS,
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No pooled connection became free within the timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded LIFO pool of DB-API connections.
+
+    `check(conn)` decides whether an idle connection may be handed out;
+    connections failing it are closed and replaced by new ones.
+    """
+
+    def __init__(self, alias, max_size, timeout, check):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self.idle = deque()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    def get(self, connect):
+        """Return an idle connection, or one made by `connect()`."""
+        start = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f'No free connection for {self.alias!r} after '
+                f'{self.timeout}s (pool size {self.max_size}).'
+            )
+        DB_POOL_WAIT_SECONDS.labels(self.alias).observe(
+            time.perf_counter() - start)
+        DB_POOL_CHECKOUTS.labels(self.alias).inc()
+        try:
+            while True:
+                with self.lock:
+                    conn = self.idle.pop() if self.idle else None
+                if conn is None:
+                    DB_CONNECTIONS_OPENED.labels(self.alias).inc()
+                    return connect()
+                if self.check(conn):
+                    return conn
+                DB_RECONNECTS.labels(self.alias).inc()
+                self.discard(conn)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, conn, discard=False):
+        """Give a checked out connection back, or close it if `discard`."""
+        try:
+            if discard:
+                self.discard(conn)
+            else:
+                with self.lock:
+                    self.idle.append(conn)
+        finally:
+            self.slots.release()
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close every idle connection."""
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for conn in idle:
+            self.discard(conn)
+
+
+def get_pool(alias, settings_dict, check):
+    """
+    Return the pool for `alias` if POOL is configured, else None.
+
+    Pools are per process, so a forked worker never reuses its parent's
+    sockets, and per database name, so connections made before the test
+    runner switches to the test database are not handed out after it.
+    """
+    options = settings_dict.get('POOL') or {}
+    if not options.get('MAX_SIZE'):
+        return None
+    key = (os.getpid(), alias, settings_dict['NAME'])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                alias, options['MAX_SIZE'], options.get('TIMEOUT', 10), check)
+    return pool
@@ -0,0 +1,74 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware marks requests to the views in REPLICA_READ_VIEWS
+as replica reads; ReplicaRouter then sends their queries to one of the
+DATABASE_REPLICAS. Everything else, and every request from a client that
+wrote in the last REPLICA_PIN_SECONDS, uses the primary.
+"""
+import contextvars
+import hashlib
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_CACHE = 'replica_pins'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def replica_reads():
+    """Whether reads of the current request may go to a replica."""
+    return _replica_reads.get()
+
+
+def activate(enabled):
+    return _replica_reads.set(enabled)
+
+
+def deactivate(token):
+    _replica_reads.reset(token)
+
+
+def pin_key(request):
+    """Cache key for the caller's credentials, or None if anonymous."""
+    auth = request.headers.get('Authorization')
+    if not auth:
+        return None
+    return 'pin:' + hashlib.sha256(auth.encode()).hexdigest()
+
+
+def pin(request):
+    """Keep the caller on the primary for REPLICA_PIN_SECONDS."""
+    key = pin_key(request)
+    if key is not None:
+        caches[PIN_CACHE].set(key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    key = pin_key(request)
+    return key is not None and caches[PIN_CACHE].get(key, False)
+
+
+class ReplicaRouter:
+    """Send replica reads to a random replica and the rest to default."""
+
+    def db_for_read(self, model, **hints):
+        # Cache tables, such as the replica pins, must not lag.
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        if settings.DATABASE_REPLICAS and replica_reads():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,336 @@
+"""
+Rental events pushed to renters and owners as server-sent events.
+
+RentalViewSet publishes an event when a rental is requested or changes
+status. The broker takes it to every web worker: Postgres LISTEN/NOTIFY,
+delivered when the publishing transaction commits, or with EVENTS_BROKER
+set to `local` an in-process stand-in for development and tests. Each
+worker's Hub hands the events to the streams of the renter and the book
+owner.
+
+Streams are served by EventStreamApp, which app/asgi.py mounts in front
+of Django at EVENTS_PATH. Under uvicorn workers an open stream is a
+coroutine waiting on the event loop, not a thread. As Django's middleware
+does not run for them, streams answer CORS preflights and add the CORS
+headers of CorsMiddleware themselves. Each connection keeps
+at most EVENTS_QUEUE_SIZE undelivered events; a client that falls
+further behind gets a `reset` event and recovers with `/api/sync/`, as
+it does after reconnecting. Streams end after EVENTS_MAX_SECONDS and
+clients reconnect, so token expiry and deploys are picked up.
+"""
+import asyncio
+import collections
+import io
+import json
+import logging
+
+from corsheaders.middleware import CorsMiddleware
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.aio import run_sync
+from core.metrics import EVENT_STREAMS, EVENTS_DROPPED
+
+logger = logging.getLogger('core.events')
+
+CHANNEL = 'rental_events'
+RECONNECT_SECONDS = 1
+ALLOW = (b'allow', b'GET, OPTIONS')
+
+
+def format_event(name, data=None):
+    """Encode one server-sent event."""
+    lines = [f'event: {name}']
+    if data is not None:
+        lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class Subscription:
+    """The undelivered events of one stream, at most `size` of them."""
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self.events = collections.deque(maxlen=size)
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def put(self, event):
+        if len(self.events) == self.events.maxlen:
+            self.overflowed = True
+            EVENTS_DROPPED.inc()
+        self.events.append(event)
+        self.ready.set()
+
+    def drain(self):
+        """Return the pending events as one chunk of the stream."""
+        if self.overflowed:
+            body = format_event('reset')
+        else:
+            body = b''.join(self.events)
+        self.events.clear()
+        self.overflowed = False
+        self.ready.clear()
+        return body
+
+
+class Hub:
+    """The subscriptions of this process, by user id."""
+
+    def __init__(self):
+        self.loop = None
+        self.listener = None
+        self.subscriptions = collections.defaultdict(set)
+
+    def __len__(self):
+        return sum(len(subs) for subs in self.subscriptions.values())
+
+    def subscribe(self, user_id):
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, settings.EVENTS_QUEUE_SIZE)
+        self.subscriptions[user_id].add(subscription)
+        if self.listener is None or self.listener.done():
+            self.listener = self.loop.create_task(broker().listen(self))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subs = self.subscriptions.get(subscription.user_id)
+        if subs is not None:
+            subs.discard(subscription)
+            if not subs:
+                del self.subscriptions[subscription.user_id]
+
+    def dispatch(self, payload):
+        """Queue a published payload for its users. Event loop only."""
+        message = json.loads(payload)
+        event = format_event('rental', message['event'])
+        for user_id in message['users']:
+            for subscription in self.subscriptions.get(user_id, ()):
+                subscription.put(event)
+
+    def reset(self):
+        """Tell every stream that events may have been missed."""
+        for subs in self.subscriptions.values():
+            for subscription in subs:
+                subscription.overflowed = True
+                subscription.ready.set()
+
+
+hub = Hub()
+
+
+class LocalBroker:
+    """In-process stand-in for LISTEN/NOTIFY: reaches this process only."""
+
+    def publish(self, payload):
+        def deliver():
+            loop = hub.loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(hub.dispatch, payload)
+        transaction.on_commit(deliver)
+
+    async def listen(self, hub):
+        pass
+
+
+class PostgresBroker:
+    """
+    Postgres LISTEN/NOTIFY. Every worker with open streams keeps one
+    connection listening, outside any pool; it must reach Postgres
+    directly, as pgbouncer in transaction mode cannot LISTEN.
+    """
+
+    def publish(self, payload):
+        # Postgres delivers notifications when the transaction commits.
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+    def connect(self):
+        db = connections['default']
+        conn = db.Database.connect(**db.get_connection_params())
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    async def listen(self, hub):
+        loop = asyncio.get_running_loop()
+        while hub.subscriptions:
+            try:
+                conn = await run_sync(self.connect)
+            except Exception:
+                logger.exception('Cannot listen for rental events')
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            lost = loop.create_future()
+
+            def readable():
+                try:
+                    conn.poll()
+                except Exception as exc:
+                    if not lost.done():
+                        lost.set_result(exc)
+                    return
+                while conn.notifies:
+                    hub.dispatch(conn.notifies.pop(0).payload)
+
+            loop.add_reader(conn.fileno(), readable)
+            try:
+                while hub.subscriptions and not lost.done():
+                    await asyncio.wait({lost}, timeout=RECONNECT_SECONDS)
+            finally:
+                loop.remove_reader(conn.fileno())
+                conn.close()
+            if lost.done():
+                logger.warning('Rental event listener lost: %s', lost.result())
+                # Notifications sent while reconnecting are lost.
+                hub.reset()
+
+
+def broker():
+    name = settings.EVENTS_BROKER or (
+        'postgres' if connections['default'].vendor == 'postgresql'
+        else 'local')
+    return PostgresBroker() if name == 'postgres' else LocalBroker()
+
+
+def publish(rental, owner_id):
+    """Push the current status of `rental` to its renter and book owner."""
+    payload = json.dumps({
+        'users': [rental.renter_id, owner_id],
+        'event': {
+            'id': rental.id,
+            'book': rental.book_id,
+            'status': rental.status,
+        },
+    })
+    broker().publish(payload)
+
+
+async def authenticate(scope):
+    """Return the user of the request's bearer token."""
+    headers = dict(scope['headers'])
+    header = headers.get(b'authorization')
+    auth = JWTAuthentication()
+    raw = auth.get_raw_token(header) if header else None
+    if raw is None:
+        return None
+    token = auth.get_validated_token(raw)
+    return await run_sync(auth.get_user, token)
+
+
+def cors_headers(scope):
+    """Return the headers CorsMiddleware would add to a response."""
+    request = ASGIRequest(scope, io.BytesIO())
+    response = HttpResponse()
+    CorsMiddleware(lambda request: response).add_response_headers(
+        request, response)
+    return [
+        (name.lower().encode('latin-1'), value.encode('latin-1'))
+        for name, value in response.items()
+        if name.lower().startswith(('access-control-', 'vary'))
+    ]
+
+
+async def respond(send, status, body, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps(body).encode(),
+    })
+
+
+async def disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(scope, receive, send):
+    """Serve one event stream."""
+    cors = cors_headers(scope)
+    if scope['method'] == 'OPTIONS':
+        # Preflights carry no credentials, so they are answered first.
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [ALLOW, (b'content-length', b'0'), *cors],
+        })
+        return await send({'type': 'http.response.body', 'body': b''})
+    if scope['method'] != 'GET':
+        return await respond(
+            send, 405, {'detail': 'Method not allowed.'}, [ALLOW, *cors])
+    try:
+        user = await authenticate(scope)
+    except APIException as exc:
+        return await respond(
+            send, exc.status_code, {'detail': exc.detail}, cors)
+    if user is None:
+        return await respond(
+            send, 401,
+            {'detail': 'Authentication credentials were not provided.'},
+            [(b'www-authenticate', b'Bearer realm="api"'), *cors])
+    if len(hub) >= settings.EVENTS_MAX_CONNECTIONS:
+        return await respond(
+            send, 503, {'detail': 'Too many event streams.'},
+            [(b'retry-after', b'5'), *cors])
+
+    loop = asyncio.get_running_loop()
+    subscription = hub.subscribe(user.id)
+    closed = loop.create_task(disconnected(receive))
+    deadline = loop.time() + settings.EVENTS_MAX_SECONDS
+    EVENT_STREAMS.inc()
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Stop nginx from buffering the stream.
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {settings.EVENTS_RETRY_MS}\n\n'.encode(),
+            'more_body': True,
+        })
+        while loop.time() < deadline:
+            ready = loop.create_task(subscription.ready.wait())
+            await asyncio.wait(
+                {ready, closed}, timeout=settings.EVENTS_KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED)
+            ready.cancel()
+            if closed.done():
+                return
+            await send({
+                'type': 'http.response.body',
+                'body': subscription.drain() or b': keepalive\n\n',
+                'more_body': True,
+            })
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        EVENT_STREAMS.dec()
+        hub.unsubscribe(subscription)
+        closed.cancel()
+
+
+class EventStreamApp:
+    """ASGI app serving EVENTS_PATH itself and the rest through `app`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == settings.EVENTS_PATH:
+            return await stream(scope, receive, send)
+        return await self.app(scope, receive, send)
@@ -0,0 +1,192 @@
+"""
+Sparse fieldsets for read requests.
+
+`?fields=id,title,owner.email` keeps only the named fields of a
+SparseFieldsetMixin serializer; dotted names select inside nested
+serializers. `?expand=book` replaces a field listed in the serializer's
+Meta.expandable_fields, usually a primary key, with the nested
+representation, or adds it; `?expand=book.owner` expands inside it.
+Names that match no field are rejected with a 400 listing them.
+
+SparseFieldsetViewMixin turns the fields the serializer ends up with into
+only() and select_related() on the view's queryset, so columns no one
+asked for are never fetched and expanded relations come in the same
+query.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse(value):
+    """Parse 'a,b.c,b.d' into {'a': {}, 'b': {'c': {}, 'd': {}}}."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree or None
+
+
+def paths(tree, prefix=''):
+    """Return the dotted paths of the leaves of a parsed tree."""
+    for name, subtree in tree.items():
+        if subtree:
+            yield from paths(subtree, f'{prefix}{name}.')
+        else:
+            yield prefix + name
+
+
+def requested(request):
+    """Return the (fields, expand) trees of a read request."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    params = getattr(request, 'query_params', request.GET)
+    return parse(params.get('fields', '')), parse(params.get('expand', ''))
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin applying `?fields=` and `?expand=`.
+
+    Meta.expandable_fields maps names to the serializer class used when
+    expanded, or to a (serializer class, keyword arguments) pair, e.g. to
+    give a `source`.
+    """
+    sparse_fields = None
+    sparse_expand = None
+    sparse_path = ''
+
+    def is_sparse_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.is_sparse_root():
+            self.sparse_fields, self.sparse_expand = requested(
+                self.context.get('request'))
+
+        expand = self.sparse_expand or {}
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        unknown = {'fields': [], 'expand': []}
+        for name in expand:
+            if name in expandable:
+                serializer_class, kwargs = expandable[name], {}
+                if isinstance(serializer_class, tuple):
+                    serializer_class, kwargs = serializer_class
+                fields[name] = serializer_class(read_only=True, **kwargs)
+            else:
+                unknown['expand'].append(self.sparse_path + name)
+
+        if self.sparse_fields is not None:
+            unknown['fields'] = [
+                self.sparse_path + name
+                for name in self.sparse_fields if name not in fields]
+            for name in list(fields):
+                if name not in self.sparse_fields:
+                    del fields[name]
+
+        for name, field in fields.items():
+            nested = getattr(field, 'child', field)
+            subfields = (self.sparse_fields or {}).get(name)
+            subexpand = expand.get(name)
+            if isinstance(nested, SparseFieldsetMixin):
+                # A nested name without a dot keeps all of its fields.
+                nested.sparse_fields = subfields or None
+                nested.sparse_expand = subexpand
+                nested.sparse_path = f'{self.sparse_path}{name}.'
+                continue
+            # Only sparse serializers have fields to select or expand.
+            prefix = f'{self.sparse_path}{name}.'
+            unknown['fields'].extend(paths(subfields or {}, prefix))
+            unknown['expand'].extend(paths(subexpand or {}, prefix))
+
+        errors = {
+            param: [f'Unknown field: {path}.' for path in names]
+            for param, names in unknown.items() if names
+        }
+        if errors:
+            raise ValidationError(errors)
+        return fields
+
+
+def resolve(model, attrs):
+    """
+    Return the model fields along `attrs`, a serializer field's
+    source_attrs, or None unless all but the last are forward relations.
+    """
+    path = []
+    for attr in attrs:
+        if path:
+            if not path[-1].many_to_one and not path[-1].one_to_one:
+                return None
+            model = path[-1].related_model
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        path.append(model_field)
+    return path or None
+
+
+def columns(serializer, prefix=''):
+    """
+    Return the only() and select_related() arguments covering what
+    `serializer` reads, or None if it reads more than model fields and
+    forward relations.
+    """
+    model = serializer.Meta.model
+    only, related = [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        path = resolve(model, field.source_attrs)
+        if path is None:
+            return None
+        for i in range(1, len(path)):
+            # Relations crossed by a dotted source, e.g. `book.owner`.
+            through = prefix + '__'.join(f.name for f in path[:i])
+            only.append(through)
+            related.append(through)
+        model_field = path[-1]
+        name = prefix + '__'.join(f.name for f in path)
+        only.append(name)
+        nested = getattr(field, 'child', field)
+        if isinstance(nested, serializers.BaseSerializer):
+            if not model_field.many_to_one and not model_field.one_to_one:
+                return None
+            inner = columns(nested, name + '__')
+            if inner is None:
+                return None
+            only.extend(inner[0])
+            related.append(name)
+            related.extend(inner[1])
+    return only, related
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin fetching only the columns and relations the serializer of a
+    `?fields=` or `?expand=` request reads.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if requested(self.request) == (None, None):
+            return queryset
+        sparse = columns(self.get_serializer())
+        if sparse is None:
+            return queryset
+        only, related = sparse
+        queryset = queryset.select_related(None)
+        if related:
+            # select_related() without arguments would follow every FK.
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
@@ -0,0 +1,141 @@
+"""
+Idempotency-Key support for write endpoints.
+"""
+import functools
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from core.models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+POLL_INTERVAL = 0.1
+
+
+class IdempotencyKeyInUse(APIException):
+    """The original request for this key has not finished in time."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is in progress.'
+    default_code = 'idempotency_key_in_use'
+
+
+def _abandoned(record, now):
+    """Whether the request holding the key's placeholder was killed."""
+    return (
+        record.status_code is None
+        and record.created_at <= now - settings.IDEMPOTENCY_LOCK_LEASE
+    )
+
+
+def _claim(user, key, endpoint):
+    """
+    Insert a placeholder row for the key, or take over an abandoned one.
+
+    Return (row, True) when the caller owns the key and must run the
+    view, otherwise (existing row, False).
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                endpoint=endpoint,
+                expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+            )
+        return record, True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(
+        user=user, key=key, endpoint=endpoint
+    ).first()
+    if record is None or record.expires_at <= now:
+        IdempotencyKey.objects.filter(
+            user=user, key=key, endpoint=endpoint, expires_at__lte=now
+        ).delete()
+        return _claim(user, key, endpoint)
+    if _abandoned(record, now):
+        # A new created_at renews the lease; it also stops the killed
+        # request, should it come back, from storing its response.
+        taken = IdempotencyKey.objects.filter(
+            id=record.id, created_at=record.created_at,
+            status_code__isnull=True,
+        ).update(created_at=now)
+        if not taken:
+            return _claim(user, key, endpoint)
+        record.created_at = now
+        return record, True
+    return record, False
+
+
+def _wait_for_response(record):
+    """Hold a concurrent duplicate until the first request completes."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TIMEOUT
+    while record.status_code is None:
+        if _abandoned(record, timezone.now()):
+            return None
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInUse()
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(id=record.id).first()
+        if record is None:
+            # The first request failed and released the key.
+            return None
+    return record
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response for a repeated Idempotency-Key.
+
+    The first response per (user, key, endpoint) is stored until it
+    expires. Raised exceptions and server errors release the key instead
+    so the client can retry, as does a request still in progress after
+    IDEMPOTENCY_LOCK_LEASE, whose worker was killed.
+    """
+
+    @functools.wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_func(self, request, *args, **kwargs)
+
+        endpoint = f'{request.method} {request.path}'[:255]
+        key = key[:255]
+        record, owned = _claim(request.user, key, endpoint)
+        if not owned:
+            record = _wait_for_response(record)
+            if record is not None:
+                response = Response(
+                    record.response, status=record.status_code)
+                response[REPLAYED_HEADER] = 'true'
+                return response
+            return wrapper(self, request, *args, **kwargs)
+
+        claimed = IdempotencyKey.objects.filter(
+            id=record.id, created_at=record.created_at,
+            status_code__isnull=True,
+        )
+        try:
+            response = view_func(self, request, *args, **kwargs)
+        except Exception:
+            claimed.delete()
+            raise
+
+        if response.status_code >= 500:
+            claimed.delete()
+        else:
+            claimed.update(
+                status_code=response.status_code,
+                response=response.data,
+            )
+        return response
+
+    return wrapper
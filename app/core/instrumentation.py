@@ -0,0 +1,88 @@
+"""
+Per-request timing counters shared by the timing middleware, serializers
+and storage backends.
+"""
+import contextvars
+from contextlib import contextmanager
+from time import perf_counter
+
+from core import tracing
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Query count and accumulated durations (seconds) for one request."""
+    __slots__ = ('queries', 'durations', '_active')
+
+    def __init__(self):
+        self.queries = 0
+        self.durations = {}
+        self._active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        """`connection.execute_wrapper` hook counting and timing SQL."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    """Count and time SQL for the current request, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def current():
+    """Return the metrics of the request being served, if any."""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name, /, span=None, **attributes):
+    """
+    Add the duration of the block to `name` on the current request.
+
+    Nested blocks with the same name are only counted once, so a nested
+    serializer does not double its parent's time. When `span` is given
+    the block is also traced under that span name.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics._active:
+        yield
+        return
+    metrics._active.add(name)
+    start = perf_counter()
+    try:
+        if span is None:
+            yield
+        else:
+            with tracing.span(span, **attributes):
+                yield
+    finally:
+        metrics.add(name, perf_counter() - start)
+        metrics._active.discard(name)
+
+
+class TimedSerializerMixin:
+    """Count `to_representation` time as serializer time."""
+
+    def to_representation(self, instance):
+        with timed('serializer', span=f'serialize {type(self).__name__}'):
+            return super().to_representation(instance)
@@ -0,0 +1,47 @@
+"""
+Django command to benchmark the REST API of a running server
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import LoadRunner
+
+
+class Command(BaseCommand):
+    """Django command to load test the API and report latency as JSON."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Number of seed_scale users to log in as.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--label', default='',
+            help='Free text stored in the report, e.g. a commit id.',
+        )
+        parser.add_argument('--output', help='Also write the report here.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        runner = LoadRunner(
+            options['base_url'], options['users'], options['seed'])
+        try:
+            report = runner.run(options['concurrency'], options['duration'])
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        report.update({
+            'label': options['label'],
+            'base_url': options['base_url'],
+            'concurrency': options['concurrency'],
+        })
+
+        body = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(body + '\n')
+        self.stdout.write(body)
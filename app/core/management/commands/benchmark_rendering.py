@@ -0,0 +1,90 @@
+"""
+Django command to benchmark serializing, rendering and compressing book
+list pages
+"""
+import json
+import statistics
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from book.serializers import BookSerializer
+from core import compression
+from core.models import Book
+from core.renderers import FastJSONRenderer
+from core.values import ValuesSerializer
+
+
+def median_ms(repeat, func, *args):
+    """Return the result of `func(*args)` and its median time in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func(*args)
+        samples.append(perf_counter() - start)
+    return result, round(statistics.median(samples) * 1000, 3)
+
+
+class Command(BaseCommand):
+    """
+    Django command to time, on book list pages from the database (e.g.
+    after `manage.py seed_scale`): fetching and serializing with
+    BookSerializer and ValuesSerializer, rendering with JSONRenderer and
+    FastJSONRenderer, then each compression.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-sizes', default='20,100,1000',
+            help='Comma separated numbers of books per page.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help='Also write the report here.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        sizes = [int(size) for size in options['page_sizes'].split(',')]
+        books = Book.objects.select_related('owner').filter(
+            is_available=True).order_by('-id')
+        if not books.exists():
+            raise CommandError('No books, run `manage.py seed_scale` first.')
+
+        def serialize(page):
+            return BookSerializer(page.all(), many=True).data
+
+        def serialize_values(page):
+            return ValuesSerializer(BookSerializer, page.all()).data
+
+        repeat = options['repeat']
+        pages = {}
+        for size in sizes:
+            data, serializer_ms = median_ms(
+                repeat, serialize, books[:size])
+            values, values_ms = median_ms(
+                repeat, serialize_values, books[:size])
+            body, json_ms = median_ms(repeat, JSONRenderer().render, data)
+            fast, fast_ms = median_ms(repeat, FastJSONRenderer().render, data)
+            page = {
+                'books': len(data),
+                'bytes': len(body),
+                'serializer_ms': serializer_ms,
+                'values_serializer_ms': values_ms,
+                'values_identical': (
+                    JSONRenderer().render(values) == body),
+                'json_ms': json_ms,
+                'fast_json_ms': fast_ms,
+                'identical': fast == body,
+            }
+            for encoding in compression.ENCODINGS:
+                compressed, ms = median_ms(
+                    repeat, compression.compress, encoding, body)
+                page[f'{encoding}_ms'] = ms
+                page[f'{encoding}_bytes'] = len(compressed)
+            pages[str(size)] = page
+
+        body = json.dumps({'repeat': repeat, 'pages': pages}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(body + '\n')
+        self.stdout.write(body)
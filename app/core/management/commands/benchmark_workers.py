@@ -0,0 +1,113 @@
+"""
+Django command to compare gunicorn worker models on the API mix
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import LoadRunner
+from core.server import WORKER_CLASSES
+
+
+def rss_mb(pid):
+    """Resident memory of `pid` and its children in MB, on Linux."""
+    try:
+        with open(f'/proc/{pid}/status') as fh:
+            rss = next(
+                int(line.split()[1]) for line in fh
+                if line.startswith('VmRSS:'))
+        with open(f'/proc/{pid}/task/{pid}/children') as fh:
+            children = [int(child) for child in fh.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return round(rss / 1024 + sum(
+        rss_mb(child) or 0 for child in children), 1)
+
+
+class Command(BaseCommand):
+    """
+    Django command to start gunicorn once per worker class, run the
+    benchmark_api mix against it and report the results side by side.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--worker-classes', default='sync,gthread',
+            help='Comma separated, from: ' + ', '.join(sorted(WORKER_CLASSES)),
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Number of seed_scale users to log in as.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the report here.')
+
+    def start(self, worker_class, options):
+        env = dict(
+            os.environ,
+            PORT=str(options['port']),
+            WEB_WORKER_CLASS=worker_class,
+            WEB_CONCURRENCY=str(options['workers']),
+            WEB_THREADS=str(options['threads']),
+        )
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f'http://127.0.0.1:{options["port"]}'
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn ({worker_class}) exited.')
+            try:
+                requests.get(url + '/api/book/', timeout=1)
+                return server, url
+            except requests.RequestException:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'gunicorn ({worker_class}) did not start.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        classes = options['worker_classes'].split(',')
+        unknown = set(classes) - WORKER_CLASSES
+        if unknown:
+            raise CommandError(f'Unknown worker classes: {sorted(unknown)}')
+
+        reports = {}
+        for worker_class in classes:
+            self.stderr.write(f'benchmarking {worker_class}...')
+            server, url = self.start(worker_class, options)
+            try:
+                runner = LoadRunner(url, options['users'], options['seed'])
+                reports[worker_class] = runner.run(
+                    options['concurrency'], options['duration'])
+                reports[worker_class]['rss_mb'] = rss_mb(server.pid)
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            finally:
+                server.terminate()
+                server.wait()
+
+        body = json.dumps({
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'concurrency': options['concurrency'],
+            'results': reports,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(body + '\n')
+        self.stdout.write(body)
@@ -0,0 +1,34 @@
+"""
+Django command to prebuild the OpenAPI schema for APP_VERSION
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.schema import SchemaView
+
+FORMATS = ('yaml', 'json')
+
+
+class Command(BaseCommand):
+    """
+    Django command to render the schema in each format into
+    SCHEMA_CACHE_DIR, so that workers of this version never generate it.
+    """
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not settings.APP_VERSION:
+            raise CommandError('APP_VERSION is not set.')
+        factory = RequestFactory()
+        view = SchemaView.as_view()
+        for fmt in FORMATS:
+            response = view(
+                factory.get(reverse('api-schema'), {'format': fmt}))
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{fmt}: schema view returned {response.status_code}')
+            self.stdout.write(f'{fmt}: {response["ETag"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Schema {settings.APP_VERSION} in {settings.SCHEMA_CACHE_DIR}'))
@@ -0,0 +1,35 @@
+"""
+Django command to purge sync changes older than SYNC_RETENTION
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Change
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete old sync changes in batches. Clients with
+    older tokens get a full snapshot on their next sync.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        cutoff = timezone.now() - settings.SYNC_RETENTION
+        purged = 0
+        while True:
+            ids = list(
+                Change.objects.filter(created_at__lt=cutoff)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            Change.objects.filter(id__in=ids).delete()
+            purged += len(ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {purged} sync changes')
+        )
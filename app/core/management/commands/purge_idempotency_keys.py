@@ -0,0 +1,31 @@
+"""
+Django command to purge expired idempotency keys
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Django command to delete expired idempotency keys in batches."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        now = timezone.now()
+        purged = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            IdempotencyKey.objects.filter(id__in=ids).delete()
+            purged += len(ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {purged} expired idempotency keys')
+        )
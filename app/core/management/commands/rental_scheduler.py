@@ -0,0 +1,87 @@
+"""
+Django command to move overdue rentals and stale rental requests along
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import sync
+from core.metrics import RENTAL_TRANSITIONS
+from core.models import Rental
+
+
+def transition_batch(queryset, from_status, to_status, batch_size):
+    """
+    Move up to `batch_size` rows of `queryset` to `to_status`.
+
+    Rows locked by another scheduler are skipped, so several processes
+    can work through the same backlog in parallel.
+    """
+    with transaction.atomic():
+        ids = list(
+            queryset.select_for_update(skip_locked=True)
+            .order_by()
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        moved = Rental.objects.filter(
+            id__in=ids, status=from_status
+        ).update(status=to_status)
+        sync.record_rentals(ids)
+        return moved
+
+
+class Command(BaseCommand):
+    """Django command to mark overdue rentals and expire stale requests."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, sleeping --interval seconds between passes.',
+        )
+        parser.add_argument('--interval', type=float, default=60)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--pending-days', type=int, default=14,
+            help='Expire pending requests older than this many days.',
+        )
+
+    def run_once(self, batch_size, pending_days):
+        """Process both backlogs in bounded batches until they are empty."""
+        today = timezone.localdate()
+        jobs = [
+            (
+                Rental.objects.filter(status='accepted', end_date__lt=today),
+                'accepted', 'overdue',
+            ),
+            (
+                Rental.objects.filter(
+                    status='pending',
+                    request_date__lt=timezone.now() - timedelta(
+                        days=pending_days),
+                ),
+                'pending', 'expired',
+            ),
+        ]
+        for queryset, from_status, to_status in jobs:
+            total = 0
+            while True:
+                moved = transition_batch(
+                    queryset, from_status, to_status, batch_size)
+                if not moved:
+                    break
+                total += moved
+                RENTAL_TRANSITIONS.labels(to_status).inc(moved)
+            self.stdout.write(f'{to_status}: {total}')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            self.run_once(options['batch_size'], options['pending_days'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,57 @@
+"""
+Django command to replay captured traffic against a running server
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Book, Rental
+from core.replay import Replayer
+from core.traffic import read_records
+
+
+class Command(BaseCommand):
+    """Django command to replay NDJSON traffic captures."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+')
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument(
+            '--speed', type=float, default=1.0,
+            help='Time compression factor; 0 replays as fast as possible.',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Number of seed_scale users the user buckets map onto.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the report here.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        records = read_records(options['files'])
+        if not records:
+            raise CommandError('No records in the capture files.')
+
+        # Captured ids do not exist locally; use ids of the seeded data.
+        replayer = Replayer(
+            options['base_url'],
+            options['users'],
+            list(Book.objects.values_list('id', flat=True)[:10000]),
+            list(Rental.objects.values_list('id', flat=True)[:10000]),
+            options['seed'],
+        )
+        report = replayer.replay(
+            records, options['speed'], options['concurrency'])
+        report.update({
+            'records': len(records),
+            'speed': options['speed'],
+            'concurrency': options['concurrency'],
+        })
+
+        body = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(body + '\n')
+        self.stdout.write(body)
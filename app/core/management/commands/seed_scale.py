@@ -0,0 +1,109 @@
+"""
+Django command to seed a database with realistic volumes of data
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Book, Rental
+
+EMAIL_TEMPLATE = 'bench{}@example.com'
+PASSWORD = 'benchpass123'
+LOREM = 'Lorem ipsum dolor sit amet. '
+
+CONDITION_WEIGHTS = {
+    'new': 10, 'like_new': 20, 'good': 40, 'fair': 20, 'poor': 10,
+}
+STATUS_WEIGHTS = {
+    'pending': 15, 'accepted': 10, 'declined': 15, 'returned': 50,
+    'cancelled': 5, 'overdue': 3, 'expired': 2,
+}
+
+
+class Command(BaseCommand):
+    """Django command to bulk create users, books and rentals."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--books', type=int, default=10000)
+        parser.add_argument('--rentals', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        User = get_user_model()
+
+        # Hashing is the slow part of creating users; every seeded user
+        # shares one password so the hash is computed once.
+        password = make_password(PASSWORD)
+        start = User.objects.filter(
+            email__startswith='bench').count()
+        User.objects.bulk_create([
+            User(
+                email=EMAIL_TEMPLATE.format(start + i),
+                password=password,
+                first_name=f'Bench{start + i}',
+                last_name='User',
+            )
+            for i in range(options['users'])
+        ], batch_size=batch_size)
+        user_ids = list(User.objects.values_list('id', flat=True))
+        self.stdout.write(f'users: {options["users"]}')
+
+        # A few prolific owners hold most books (Pareto distributed).
+        owner_weights = [rng.paretovariate(1.2) for _ in user_ids]
+        conditions = list(CONDITION_WEIGHTS)
+        authors = max(1, options['books'] // 5)
+        last_book_id = Book.objects.aggregate(last=Max('id'))['last'] or 0
+        Book.objects.bulk_create([
+            Book(
+                owner_id=owner_id,
+                title=f'Book {i}',
+                author=f'Author {rng.randrange(authors)}',
+                description=LOREM * rng.randrange(20),
+                condition=rng.choices(
+                    conditions, CONDITION_WEIGHTS.values())[0],
+                is_available=rng.random() < 0.7,
+            )
+            for i, owner_id in enumerate(rng.choices(
+                user_ids, owner_weights, k=options['books']))
+        ], batch_size=batch_size)
+        # Read ids back; not every backend returns them from bulk_create.
+        books = list(
+            Book.objects.filter(id__gt=last_book_id)
+            .values_list('id', 'owner_id')
+        )
+        self.stdout.write(f'books: {len(books)}')
+
+        statuses = list(STATUS_WEIGHTS)
+        today = timezone.localdate()
+        pending = set()
+        rentals = []
+        for _ in range(options['rentals']):
+            book_id, owner_id = rng.choice(books)
+            renter_id = rng.choice(user_ids)
+            if renter_id == owner_id:
+                continue
+            status = rng.choices(statuses, STATUS_WEIGHTS.values())[0]
+            if status == 'pending':
+                if (renter_id, book_id) in pending:
+                    continue
+                pending.add((renter_id, book_id))
+            start_date = today - timedelta(days=rng.randrange(180))
+            rentals.append(Rental(
+                renter_id=renter_id,
+                book_id=book_id,
+                status=status,
+                start_date=start_date,
+                end_date=start_date + timedelta(days=rng.randrange(3, 30)),
+            ))
+        Rental.objects.bulk_create(rentals, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'rentals: {len(rentals)}'))
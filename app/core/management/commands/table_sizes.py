@@ -0,0 +1,30 @@
+"""
+Django command to report table and index sizes of the core tables
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Book, Rental
+
+
+class Command(BaseCommand):
+    """Django command to report on-disk table and index sizes."""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('Table sizes are only reported on PostgreSQL.')
+
+        with connection.cursor() as cursor:
+            for model in (Book, Rental):
+                table = model._meta.db_table
+                cursor.execute(
+                    'SELECT count(*), pg_table_size(%s), pg_indexes_size(%s) '
+                    'FROM ' + connection.ops.quote_name(table),
+                    [table, table],
+                )
+                rows, table_bytes, index_bytes = cursor.fetchone()
+                self.stdout.write(
+                    f'{table}: rows={rows} table={table_bytes} '
+                    f'indexes={index_bytes}'
+                )
@@ -0,0 +1,25 @@
+"""
+Django command to refresh the checked-in SQL query baseline
+"""
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from core.test.test_query_counts import UPDATE_ENV
+
+
+class Command(BaseCommand):
+    """
+    Django command to rewrite the query counts and shapes of the database
+    in use in core/test/query_baseline.json.
+    """
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        os.environ[UPDATE_ENV] = '1'
+        try:
+            call_command(
+                'test', 'core.test.test_query_counts', interactive=False)
+        finally:
+            del os.environ[UPDATE_ENV]
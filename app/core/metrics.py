@@ -0,0 +1,106 @@
+"""
+Prometheus metrics for the API.
+
+When PROMETHEUS_MULTIPROC_DIR is set (see scripts/run.sh) every gunicorn
+worker writes its samples to mmap'd files in that directory and the
+/metrics view aggregates them, so no sample leaves the process on the
+request path.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by view and action.',
+    ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'SQL queries issued per request.',
+    ['view'],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds',
+    'Time spent in SQL per request.',
+    ['view'],
+)
+RENTAL_TRANSITIONS = Counter(
+    'rental_transitions_total',
+    'Rental status transitions.',
+    ['status'],
+)
+EVENT_STREAMS = Gauge(
+    'rental_event_streams',
+    'Open rental event streams.',
+    multiprocess_mode='livesum',
+)
+EVENTS_DROPPED = Counter(
+    'rental_events_dropped_total',
+    'Rental events dropped from the queue of a stream that fell behind.',
+)
+IMAGE_UPLOAD_BYTES = Histogram(
+    'book_image_upload_bytes',
+    'Size of uploaded book images.',
+    buckets=(
+        16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20, 16 << 20,
+        float('inf'),
+    ),
+)
+
+DB_CONNECTIONS_OPENED = Counter(
+    'db_connections_opened_total',
+    'New physical database connections.',
+    ['alias'],
+)
+DB_RECONNECTS = Counter(
+    'db_reconnects_total',
+    'Connections dropped by a failed health check.',
+    ['alias'],
+)
+DB_POOL_CHECKOUTS = Counter(
+    'db_pool_checkouts_total',
+    'Connections handed out by the in-process pool.',
+    ['alias'],
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a free pooled connection.',
+    ['alias'],
+    buckets=(.0005, .001, .005, .01, .05, .1, .5, 1, 5, float('inf')),
+)
+
+
+def view_label(view_func, method):
+    """Return a label such as `BookViewSet.list` for a resolved view."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+
+
+def observe_request(view, method, status, seconds, queries, db_seconds):
+    REQUEST_LATENCY.labels(view, method, status).observe(seconds)
+    REQUEST_DB_QUERIES.labels(view).observe(queries)
+    REQUEST_DB_SECONDS.labels(view).observe(db_seconds)
+
+
+def exposition():
+    """Return the (content type, body) of the current metrics."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return CONTENT_TYPE_LATEST, generate_latest(registry)
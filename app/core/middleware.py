@@ -0,0 +1,283 @@
+"""
+Middleware for the core app.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from time import perf_counter
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from core import (
+    compression,
+    instrumentation,
+    metrics as prometheus,
+    tracing,
+    traffic,
+)
+from core.db import routers
+
+logger = logging.getLogger('core.timing')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI.
+
+    Subclasses implement `handle(request)` as a generator: it yields once
+    where the view runs, is sent the response and returns the response to
+    pass on. Running the same code on the event loop keeps ASGI requests
+    from queueing for Django's single thread for sync middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        flow = self.handle(request)
+        next(flow)
+        try:
+            response = self.get_response(request)
+        except BaseException as exc:
+            flow.throw(exc)
+            raise
+        try:
+            flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+        raise RuntimeError(f'{type(self).__name__}.handle yielded twice.')
+
+    async def __acall__(self, request):
+        flow = self.handle(request)
+        next(flow)
+        try:
+            response = await self.get_response(request)
+        except BaseException as exc:
+            flow.throw(exc)
+            raise
+        try:
+            flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+        raise RuntimeError(f'{type(self).__name__}.handle yielded twice.')
+
+    def handle(self, request):
+        return (yield)
+
+
+class RequestTimingMiddleware(HybridMiddleware):
+    """
+    Report SQL, serializer, storage and total time of every request.
+
+    The numbers are sent in a `Server-Timing` header, recorded in the
+    Prometheus histograms and logged as a JSON line when the request
+    exceeds the configured thresholds.
+    """
+
+    def handle(self, request):
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.activate(metrics)
+        start = perf_counter()
+        try:
+            response = yield
+        finally:
+            instrumentation.deactivate(token)
+        total = perf_counter() - start
+        prometheus.observe_request(
+            getattr(request, 'metrics_view', 'unresolved'),
+            request.method,
+            response.status_code,
+            total,
+            metrics.queries,
+            metrics.durations.get('db', 0.0),
+        )
+
+        timings = {
+            name: round(seconds * 1000, 2)
+            for name, seconds in metrics.durations.items()
+        }
+        timings['total'] = round(total * 1000, 2)
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={ms}' for name, ms in timings.items()
+        ) + f', queries;desc="{metrics.queries}"'
+
+        if (timings['total'] >= settings.REQUEST_TIMING_SLOW_MS or
+                metrics.queries >= settings.REQUEST_TIMING_SLOW_QUERIES):
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': metrics.queries,
+                'ms': timings,
+            }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = prometheus.view_label(
+            view_func, request.method)
+
+
+class TracingMiddleware(HybridMiddleware):
+    """
+    Trace sampled requests from the view down to each SQL statement.
+
+    The trace id of an incoming `traceparent` header is continued and the
+    root span is returned in a `traceparent` response header.
+    """
+
+    def handle(self, request):
+        root = tracing.start_trace(request.headers)
+        if root is None:
+            return (yield)
+
+        root.attributes.update({
+            'http.method': request.method,
+            'http.target': request.path,
+        })
+        with tracing.activate(root):
+            response = yield
+            root.attributes['http.status_code'] = response.status_code
+            root.error = response.status_code >= 500
+        response[tracing.HEADER] = (
+            f'00-{root.trace.trace_id}-{root.span_id}-01')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        root = tracing.current()
+        if root is not None:
+            root.name = prometheus.view_label(view_func, request.method)
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """
+    Compress responses with brotli or gzip, as the client accepts.
+
+    Bodies shorter than COMPRESSION_MIN_BYTES, types not matching
+    COMPRESSION_TYPES and responses that are already encoded are sent as
+    they are. Streaming responses are compressed as they stream.
+    """
+
+    def handle(self, request):
+        response = yield
+        if (
+            response.has_header('Content-Encoding')
+            or not compression.compressible(
+                response.get('Content-Type', ''))
+            or (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_BYTES)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(
+            request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                encoding, response.streaming_content)
+            del response['Content-Length']
+        else:
+            with instrumentation.timed('compress'):
+                body = compression.compress(encoding, response.content)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        # The encoded body is no longer byte-identical to the strong ETag.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class TrafficCaptureMiddleware(HybridMiddleware):
+    """Record a sample of requests for `manage.py replay_traffic`."""
+
+    def handle(self, request):
+        rate = settings.TRAFFIC_CAPTURE_RATE
+        if not rate or random.random() >= rate:
+            return (yield)
+
+        ts = time.time()
+        body = traffic.body_shape(request)
+        start = perf_counter()
+        response = yield
+        elapsed = perf_counter() - start
+
+        match = request.resolver_match
+        if match is not None:
+            traffic.write_record({
+                'ts': ts,
+                'method': request.method,
+                'route': traffic.route_template(match),
+                'view': getattr(request, 'metrics_view', None),
+                'params': {
+                    key: request.GET.getlist(key) for key in request.GET
+                },
+                'body': body,
+                'user': traffic.user_bucket(request),
+                'status': response.status_code,
+                'ms': round(elapsed * 1000, 2),
+            })
+        return response
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Let safe reads of REPLICA_READ_VIEWS use a read replica.
+
+    A successful write pins its caller to the primary for a short while,
+    so the caller reads its own writes despite replication lag. POSTs to
+    READ_ONLY_POST_VIEWS only read: they neither pin nor need the primary.
+    """
+
+    def handle(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return (yield)
+        try:
+            response = yield
+        finally:
+            # Set again rather than reset: under ASGI process_view runs in
+            # a copy of this context.
+            if getattr(request, 'replica_reads', False):
+                routers.activate(False)
+        if (
+            request.method not in SAFE_METHODS
+            and not getattr(request, 'read_only', False)
+            and response.status_code < 400
+        ):
+            routers.pin(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS:
+            return
+        label = prometheus.view_label(view_func, request.method)
+        request.read_only = request.method in SAFE_METHODS or (
+            request.method == 'POST'
+            and label in settings.READ_ONLY_POST_VIEWS)
+        if (
+            request.read_only
+            and label in settings.REPLICA_READ_VIEWS
+            and not routers.is_pinned(request)
+        ):
+            request.replica_reads = True
+            routers.activate(True)
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rental'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['owner', '-id'], name='book_owner_id_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-id'], name='book_available_id_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['book'], name='rental_book_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'end_date'], name='rental_status_end_date_idx'),
+        ),
+    ]
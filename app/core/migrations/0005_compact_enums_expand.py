@@ -0,0 +1,23 @@
+# Expand step for storing Book.condition and Rental.status as small integers.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_book_rental_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='condition_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
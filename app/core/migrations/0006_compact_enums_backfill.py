@@ -0,0 +1,70 @@
+# Backfill the small integer columns in batches, outside one long transaction.
+
+from django.db import migrations
+from django.db.models import Case, Q, When, Value
+
+BATCH_SIZE = 1000
+
+# Frozen copies of the model choices; the code is the index in the list.
+CONDITIONS = ['new', 'like_new', 'good', 'fair', 'poor']
+STATUSES = ['pending', 'accepted', 'declined', 'returned', 'cancelled']
+
+# (model, field, values, default for rows holding an unknown value)
+FIELDS = [
+    ('Book', 'condition', CONDITIONS, 'good'),
+    ('Rental', 'status', STATUSES, 'pending'),
+]
+
+
+def batched_update(queryset, **updates):
+    """Apply `updates` to `queryset` in primary key batches."""
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        queryset.model.objects.filter(id__in=ids).update(**updates)
+        last_id = ids[-1]
+
+
+def to_codes(apps, schema_editor):
+    for model_name, name, values, default in FIELDS:
+        model = apps.get_model('core', model_name)
+        batched_update(
+            model.objects.filter(**{f'{name}_code__isnull': True}),
+            **{f'{name}_code': Case(
+                *[When(Q(**{name: v}), then=Value(code))
+                  for code, v in enumerate(values)],
+                default=Value(values.index(default)),
+            )}
+        )
+
+
+def to_strings(apps, schema_editor):
+    for model_name, name, values, default in FIELDS:
+        model = apps.get_model('core', model_name)
+        batched_update(
+            model.objects.all(),
+            **{name: Case(
+                *[When(Q(**{f'{name}_code': code}), then=Value(v))
+                  for code, v in enumerate(values)],
+                default=Value(default),
+            )}
+        )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_compact_enums_expand'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_codes, to_strings),
+    ]
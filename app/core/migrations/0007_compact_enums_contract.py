@@ -0,0 +1,91 @@
+# Contract step: swap the small integer columns in for the string columns.
+#
+# Containers still running the previous release write only the string
+# columns until they are replaced, so rows written since 0006 may have no
+# code or a stale one. Both tables are locked against writes (reads go
+# on), every code is recomputed from its string, and the columns are
+# swapped in the same transaction, so no write falls in between. The
+# rental indexes are rebuilt without blocking writes by
+# 0014_compact_enums_indexes.
+
+import core.models.fields
+from django.db import migrations, models
+from django.db.models import Case, Q, Value, When
+
+# Frozen copies of the model choices; the code is the index in the list.
+CONDITIONS = ['new', 'like_new', 'good', 'fair', 'poor']
+STATUSES = ['pending', 'accepted', 'declined', 'returned', 'cancelled']
+
+# (model, field, values, default for rows holding an unknown value)
+FIELDS = [
+    ('Book', 'condition', CONDITIONS, 'good'),
+    ('Rental', 'status', STATUSES, 'pending'),
+]
+
+
+def reconcile_codes(apps, schema_editor):
+    """Recompute the codes of rows written since the backfill."""
+    models = [apps.get_model('core', name) for name, *_ in FIELDS]
+    if schema_editor.connection.vendor == 'postgresql':
+        tables = ', '.join(
+            schema_editor.quote_name(model._meta.db_table)
+            for model in models)
+        schema_editor.execute(
+            f'LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE')
+    for model, (_, name, values, default) in zip(models, FIELDS):
+        code = Case(
+            *[When(Q(**{name: v}), then=Value(code))
+              for code, v in enumerate(values)],
+            default=Value(values.index(default)),
+        )
+        model.objects.filter(
+            Q(**{f'{name}_code__isnull': True})
+            | ~Q(**{f'{name}_code': code})
+        ).update(**{f'{name}_code': code})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_compact_enums_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_codes, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='rental',
+            name='rental_book_pending_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rental',
+            name='rental_status_end_date_idx',
+        ),
+        migrations.RemoveField(
+            model_name='book',
+            name='condition',
+        ),
+        migrations.RemoveField(
+            model_name='rental',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='book',
+            old_name='condition_code',
+            new_name='condition',
+        ),
+        migrations.RenameField(
+            model_name='rental',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='condition',
+            field=core.models.fields.CompactChoiceField(choices=[('new', 'New'), ('like_new', 'Like New'), ('good', 'Good'), ('fair', 'Fair'), ('poor', 'Poor')], default='good'),
+        ),
+        migrations.AlterField(
+            model_name='rental',
+            name='status',
+            field=core.models.fields.CompactChoiceField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('returned', 'Returned'), ('cancelled', 'Cancelled')], default='pending'),
+        ),
+    ]
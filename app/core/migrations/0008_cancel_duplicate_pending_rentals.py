@@ -0,0 +1,39 @@
+# Collapse duplicate pending rentals before the partial unique constraint.
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+BATCH_SIZE = 500
+
+
+def cancel_duplicates(apps, schema_editor):
+    """Keep the oldest pending request per renter and book."""
+    Rental = apps.get_model('core', 'Rental')
+    pending = Rental.objects.filter(status='pending')
+    while True:
+        groups = list(
+            pending.values('renter_id', 'book_id')
+            .annotate(rows=Count('id'), keep=Min('id'))
+            .filter(rows__gt=1)
+            .order_by()[:BATCH_SIZE]
+        )
+        if not groups:
+            return
+        for group in groups:
+            pending.filter(
+                renter_id=group['renter_id'],
+                book_id=group['book_id'],
+            ).exclude(id=group['keep']).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_compact_enums_contract'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicates, migrations.RunPython.noop),
+    ]
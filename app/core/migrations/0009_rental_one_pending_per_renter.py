@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-19 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_cancel_duplicate_pending_rentals'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='rental',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('renter', 'book'), name='rental_one_pending_per_renter'),
+        ),
+    ]
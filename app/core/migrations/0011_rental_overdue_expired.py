@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 04:55
+
+import core.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rental',
+            name='status',
+            field=core.models.fields.CompactChoiceField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('returned', 'Returned'), ('cancelled', 'Cancelled'), ('overdue', 'Overdue'), ('expired', 'Expired')], default='pending'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['request_date'], name='rental_pending_requested_idx'),
+        ),
+    ]
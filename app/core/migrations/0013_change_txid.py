@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='txid',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['user', 'txid'], name='change_user_txid_idx'),
+        ),
+    ]
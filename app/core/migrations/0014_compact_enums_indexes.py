@@ -0,0 +1,26 @@
+# Rebuild the rental indexes dropped with the string status column by
+# 0007_compact_enums_contract, without blocking writes while they build.
+
+from django.db import migrations, models
+
+import core.db.operations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0013_change_txid'),
+    ]
+
+    operations = [
+        core.db.operations.AddIndexConcurrently(
+            model_name='rental',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['book'], name='rental_book_pending_idx'),
+        ),
+        core.db.operations.AddIndexConcurrently(
+            model_name='rental',
+            index=models.Index(fields=['status', 'end_date'], name='rental_status_end_date_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
 from .user_model import User  # noqa: F401
 from .book_model import Book  # noqa: F401
 from .rental_model import Rental  # noqa: F401
+from .idempotency_model import IdempotencyKey  # noqa: F401
+from .change_model import Change  # noqa: F401
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from core.models.fields import CompactChoiceField
 import uuid
 import os
 
@@ -29,8 +30,7 @@ class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
     description = models.TextField(blank=True)
-    condition = models.CharField(
-        max_length=20,
+    condition = CompactChoiceField(
         choices=CONDITION_CHOICES,
         default='good',
     )
@@ -42,5 +42,20 @@ class Book(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves `BookViewSet.mine`: owner filter, newest first.
+            models.Index(
+                fields=['owner', '-id'],
+                name='book_owner_id_desc_idx',
+            ),
+            # Serves browsing: only available books, newest first.
+            models.Index(
+                fields=['-id'],
+                name='book_available_id_desc_idx',
+                condition=models.Q(is_available=True),
+            ),
+        ]
+
     def __str__(self):
         return self.title
@@ -0,0 +1,61 @@
+"""
+Change log database model for the core app.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from core.models.fields import CompactChoiceField
+
+
+class Change(models.Model):
+    """
+    A book or rental a user can see was saved or deleted.
+
+    The id is the change sequence `/api/sync/` tokens point into. Rows
+    outlive the objects they describe, so deletions are kept as
+    tombstones, and the user is not a constraint so that deleting a user
+    can still log the rows their deletion cascades to. On Postgres each
+    row also keeps the id of the transaction that wrote it.
+    """
+    KIND_CHOICES = [
+        ('book', 'Book'),
+        ('rental', 'Rental'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+    kind = CompactChoiceField(choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    txid = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves sync: a user's changes after a sequence number.
+            models.Index(
+                fields=['user', 'id'],
+                name='change_user_seq_idx',
+            ),
+            # Serves sync on Postgres: changes of transactions that were
+            # still in flight at the last sync.
+            models.Index(
+                fields=['user', 'txid'],
+                name='change_user_txid_idx',
+            ),
+            # Retention purges by age.
+            models.Index(
+                fields=['created_at'],
+                name='change_created_at_idx',
+            ),
+        ]
+
+    def __str__(self):
+        action = 'deleted' if self.deleted else 'saved'
+        return f'{self.kind} {self.object_id} {action} ({self.user_id})'
@@ -0,0 +1,56 @@
+"""
+Custom model fields for the core app.
+"""
+from django.core import exceptions
+from django.db import models
+
+
+class CompactChoiceField(models.PositiveSmallIntegerField):
+    """
+    Choice field stored as a small integer but exposed as its string value.
+
+    Codes follow the order of `choices`, so new choices must be appended
+    and existing ones never reordered or removed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.codes = {
+            value: code for code, (value, _) in enumerate(self.choices)
+        }
+        self.values = {code: value for value, code in self.codes.items()}
+
+    @property
+    def validators(self):
+        # Range validators of integer fields cannot compare string values;
+        # membership in `choices` is checked by `validate()` instead.
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.values[value]
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        try:
+            return self.values[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return self.codes[value]
+        except KeyError:
+            raise ValueError(
+                f"Field '{self.name}' expected one of "
+                f"{list(self.codes)} but got {value!r}."
+            )
@@ -0,0 +1,33 @@
+"""
+Idempotency key database model for the core app.
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a write request sent with an Idempotency-Key."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=255)
+    # Null while the first request is still running.
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key', 'endpoint'],
+                name='idempotency_user_key_endpoint_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.endpoint} ({self.key})'
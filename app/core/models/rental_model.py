@@ -3,6 +3,7 @@ Rental Database model for the core app.
 """
 from django.db import models
 from django.conf import settings
+from core.models.fields import CompactChoiceField
 from core.models import Book
 
 
@@ -14,6 +15,8 @@ class Rental(models.Model):
         ('declined', 'Declined'),
         ('returned', 'Returned'),
         ('cancelled', 'Cancelled'),
+        ('overdue', 'Overdue'),
+        ('expired', 'Expired'),
     ]
 
     renter = models.ForeignKey(
@@ -26,8 +29,7 @@ class Rental(models.Model):
         on_delete=models.CASCADE,
         related_name='rentals'
     )
-    status = models.CharField(
-        max_length=20,
+    status = CompactChoiceField(
         choices=STATUS_CHOICES,
         default='pending'
     )
@@ -36,5 +38,33 @@ class Rental(models.Model):
     end_date = models.DateField(null=True, blank=True)
     message = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Pending requests for a given book.
+            models.Index(
+                fields=['book'],
+                name='rental_book_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+            # Overdue scans: status equality plus end_date range.
+            models.Index(
+                fields=['status', 'end_date'],
+                name='rental_status_end_date_idx',
+            ),
+            # Stale pending request scans by the scheduler.
+            models.Index(
+                fields=['request_date'],
+                name='rental_pending_requested_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['renter', 'book'],
+                condition=models.Q(status='pending'),
+                name='rental_one_pending_per_renter',
+            ),
+        ]
+
     def __str__(self):
         return f'{self.renter} → {self.book} ({self.status})'
@@ -0,0 +1,60 @@
+"""
+Opt-in limit/offset pagination.
+
+Lists of views using OptInPagination stay plain arrays, as clients have
+always received them, unless the request passes `?limit=`. Those get
+limit/offset pages of at most OPT_IN_MAX_PAGE_SIZE rows, which bounds the
+rows, embedded objects and bytes one response carries. Only `?limit=`
+changes the shape of the response; `?expand=` changes what is in it.
+
+Expanded arrays are still bounded: an `?expand=` request without
+`?limit=` gets at most OPT_IN_MAX_PAGE_SIZE rows. When rows were left
+out, the response carries a `Link: <...>; rel="next"` header pointing at
+the page holding the rest.
+"""
+from django.conf import settings
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class OptInPagination(LimitOffsetPagination):
+    """LimitOffsetPagination for requests with `?limit=`."""
+
+    expand_query_param = 'expand'
+
+    @property
+    def default_limit(self):
+        return settings.OPT_IN_PAGE_SIZE
+
+    @property
+    def max_limit(self):
+        return settings.OPT_IN_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.capped = False
+        params = request.query_params
+        if self.limit_query_param in params:
+            return super().paginate_queryset(queryset, request, view)
+        if not params.get(self.expand_query_param):
+            return None
+        # Cap the array without counting: fetch one extra row to learn
+        # whether anything was left out.
+        self.capped = True
+        self.request = request
+        self.limit, self.offset = self.max_limit, 0
+        rows = list(queryset[:self.limit + 1])
+        self.truncated = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_paginated_response(self, data):
+        if not self.capped:
+            return super().get_paginated_response(data)
+        response = Response(data)
+        if self.truncated:
+            url = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.limit_query_param, self.limit)
+            url = replace_query_param(url, self.offset_query_param, self.limit)
+            response['Link'] = f'<{url}>; rel="next"'
+        return response
@@ -0,0 +1,97 @@
+"""
+On-demand cProfile capture for live API requests.
+
+A request is profiled when a staff user sends `X-Profile: 1`, or when it
+is picked by PROFILE_SAMPLE_RATE. Each worker profiles one request at a
+time and at most PROFILE_MAX_PER_MINUTE requests per minute. The pstats
+files land in PROFILE_DIR and can be turned into flamegraphs with tools
+such as flameprof or snakeviz.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+
+HEADER = 'X-Profile'
+RESPONSE_HEADER = 'X-Profile-Id'
+
+
+class RateLimiter:
+    """Allow at most `settings.PROFILE_MAX_PER_MINUTE` profiles a minute."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = threading.Lock()
+        self.window_start = 0.0
+        self.count = 0
+
+    def acquire(self):
+        """Reserve a profiling slot; release() must follow on success."""
+        if not self.active.acquire(blocking=False):
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start = now
+                self.count = 0
+            if self.count >= settings.PROFILE_MAX_PER_MINUTE:
+                self.active.release()
+                return False
+            self.count += 1
+        return True
+
+    def release(self):
+        self.active.release()
+
+
+limiter = RateLimiter()
+
+
+def wants_profile(request):
+    """Return True when `request` asks for, or is sampled into, a profile."""
+    if request.headers.get(HEADER) == '1' and request.user.is_staff:
+        return True
+    rate = settings.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class ProfiledViewMixin:
+    """Run cProfile around the handler of selected requests."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # finalize_response() is skipped when an unhandled exception is
+            # re-raised; stop profiling this thread and free the slot anyway.
+            profiler = getattr(self, '_profiler', None)
+            if profiler is not None:
+                profiler.disable()
+                self._profiler = None
+                limiter.release()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if wants_profile(request) and limiter.acquire():
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        profiler = getattr(self, '_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._profiler = None
+            try:
+                name = (
+                    f'{type(self).__name__}.{self.action}-'
+                    f'{int(time.time() * 1000)}-{os.getpid()}.pstats'
+                )
+                os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+                profiler.dump_stats(os.path.join(settings.PROFILE_DIR, name))
+            finally:
+                limiter.release()
+            response[RESPONSE_HEADER] = name
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,58 @@
+"""
+JSON rendering with orjson.
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer with the
+default COMPACT_JSON, UNICODE_JSON and STRICT_JSON settings, several
+times faster on large lists. Values orjson has no native type for
+(Decimals, lazy strings, querysets, ...) go through DRF's own encoder.
+Indented output, non-default JSON settings, data orjson rejects (such as
+integers beyond 64 bits) and a missing orjson fall back to JSONRenderer.
+
+Two differences remain, neither reachable from our serializers, which
+render no floats: exponents are written as 1e16 rather than 1e+16, and
+NaN and infinity become null rather than an error.
+"""
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSONRenderer escapes these for embedding in JavaScript.
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer using orjson where that gives the same output."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=(
+                    orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                    | orjson.OPT_NON_STR_KEYS
+                ),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        for char, escape in LINE_SEPARATORS:
+            if char in ret:
+                ret = ret.replace(char, escape)
+        return ret
@@ -0,0 +1,97 @@
+"""
+Replay of captured traffic, see core.traffic.
+"""
+import io
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from core.benchmark import LoadRunner, summarize
+from core.management.commands.seed_scale import EMAIL_TEMPLATE, PASSWORD
+
+ROUTE_ARG_RE = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+def jpeg():
+    buf = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(buf, format='JPEG')
+    buf.seek(0)
+    return buf
+
+
+class Replayer(LoadRunner):
+    """Replay captured records with seeded ids and users."""
+
+    def __init__(self, base_url, users, book_ids, rental_ids, seed=0):
+        super().__init__(base_url, users, seed)
+        self.book_ids = book_ids
+        self.rental_ids = rental_ids
+
+    def ids_for(self, record):
+        view = record.get('view') or ''
+        return self.rental_ids if view.startswith('Rental') else self.book_ids
+
+    def build(self, record, rng):
+        """Return (path, data, files) with seeded ids filled in."""
+        ids = self.ids_for(record) or [0]
+        path = '/' + ROUTE_ARG_RE.sub(
+            lambda match: str(rng.choice(ids)), record['route'])
+        data, files = {}, {}
+        for key, kind in (record.get('body') or {}).items():
+            if key == 'email':
+                data[key] = self.email_for(rng.randrange(self.users))
+            elif key == 'password':
+                data[key] = PASSWORD
+            elif kind == 'file':
+                files[key] = ('replay.jpg', jpeg(), 'image/jpeg')
+            elif kind == 'int':
+                data[key] = rng.choice(self.book_ids or [0])
+            elif kind == 'bool':
+                data[key] = 'true'
+            else:
+                data[key] = 'replay'
+        return path, data, files
+
+    def send(self, record, seed):
+        rng = random.Random(seed)
+        path, data, files = self.build(record, rng)
+        token = None
+        if record.get('user') is not None:
+            token = self.token(self.email_for(record['user']))
+        self.call(
+            record.get('view') or record['route'], record['method'], path,
+            token, params=record.get('params') or None,
+            data=data or None, files=files or None,
+        )
+
+    def email_for(self, bucket):
+        return EMAIL_TEMPLATE.format(bucket % self.users)
+
+    def replay(self, records, speed, concurrency):
+        """
+        Send `records` keeping their relative timing divided by `speed`;
+        a speed of 0 sends them as fast as `concurrency` allows.
+        """
+        if not records:
+            return summarize({}, {}, 0)
+        start = time.monotonic()
+        first_ts = records[0]['ts']
+        with ThreadPoolExecutor(concurrency) as pool:
+            futures = []
+            for record in records:
+                if speed > 0:
+                    due = start + (record['ts'] - first_ts) / speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(
+                    pool.submit(self.send, record, self.rng.random()))
+            for future in futures:
+                future.result()
+        self.latencies.pop('login_setup', None)
+        self.errors.pop('login_setup', None)
+        return summarize(
+            self.latencies, self.errors, time.monotonic() - start)
@@ -0,0 +1,127 @@
+"""
+OpenAPI schema served from a per-process cache.
+
+The schema only changes with the code, so each rendering (YAML or JSON,
+per API version and language) is generated once per process, gzipped
+once and served with a strong ETag. When APP_VERSION is set the rendered
+documents are also kept in SCHEMA_CACHE_DIR, where `manage.py
+build_schema` can prebuild them, so new workers skip generation too.
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.views import SpectacularAPIView
+
+GZIP_RE = re.compile(r'\bgzip\b')
+
+_documents = {}
+_lock = threading.Lock()
+
+
+class SchemaDocument:
+    """One rendered schema with its gzipped body and ETag."""
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+
+def artifact_path(key):
+    """Where the document for `key` is kept, or None without APP_VERSION."""
+    if not settings.APP_VERSION:
+        return None
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(
+        settings.SCHEMA_CACHE_DIR, f'{settings.APP_VERSION}-{digest}')
+
+
+def load_or_build(key, build):
+    """Return the cached document for `key`, calling `build()` if needed."""
+    document = _documents.get(key)
+    if document is not None:
+        return document
+    with _lock:
+        document = _documents.get(key)
+        if document is not None:
+            return document
+        path = artifact_path(key)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as fh:
+                body = fh.read()
+        else:
+            body = build()
+            if path:
+                os.makedirs(settings.SCHEMA_CACHE_DIR, exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as fh:
+                    fh.write(body)
+                os.replace(tmp, path)
+        document = _documents[key] = SchemaDocument(body)
+    return document
+
+
+def clear():
+    _documents.clear()
+
+
+class SchemaView(SpectacularAPIView):
+    """
+    SpectacularAPIView served from the cache, with ETag and gzip.
+    """
+
+    def _get_schema_response(self, request):
+        if not self.serve_public:
+            # The schema then depends on the user's permissions.
+            return super()._get_schema_response(request)
+
+        version = (
+            self.api_version or request.version
+            or self._get_version_parameter(request)
+        )
+        renderer = request.accepted_renderer
+        # The media type, not just the format: it may carry an indent.
+        key = (
+            request.accepted_media_type, version, translation.get_language())
+
+        def build():
+            generator = self.generator_class(
+                urlconf=self.urlconf, api_version=version,
+                patterns=self.patterns,
+            )
+            schema = generator.get_schema(request=request, public=True)
+            return renderer.render(schema, request.accepted_media_type, {
+                'request': request, 'view': self,
+            })
+
+        document = load_or_build(key, build)
+        use_gzip = bool(
+            GZIP_RE.search(request.headers.get('Accept-Encoding', '')))
+        etag = f'"{document.etag}{"-gzip" if use_gzip else ""}"'
+
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(
+                document.gzipped if use_gzip else document.body,
+                content_type=content_type,
+            )
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, version)}"')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
@@ -0,0 +1,72 @@
+"""
+Worker sizing for gunicorn.conf.py.
+
+Reads the CPU quota and memory limit of the container (cgroup v2, then
+v1, then the host) so the worker count fits the box the app runs in
+rather than the machine underneath it. No Django imports: this runs in
+the gunicorn master before the app is loaded.
+"""
+import math
+import os
+
+WORKER_CLASSES = {'sync', 'gthread', 'gevent', 'uvicorn'}
+
+
+def _read(path):
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit():
+    """CPUs available to this process, honouring a cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _read('/sys/fs/cgroup/cpu.max')
+    if quota:
+        limit, period = quota.split()
+        if limit != 'max':
+            cpus = min(cpus, int(limit) / int(period))
+    else:
+        limit = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        if limit and period and int(limit) > 0:
+            cpus = min(cpus, int(limit) / int(period))
+    return max(1, math.ceil(cpus))
+
+
+def memory_limit():
+    """Bytes of memory available to this process, or None if unknown."""
+    for path in (
+        '/sys/fs/cgroup/memory.max',
+        '/sys/fs/cgroup/memory/memory.limit_in_bytes',
+    ):
+        value = _read(path)
+        # cgroup v1 reports "no limit" as a huge page-aligned number.
+        if value and value != 'max' and int(value) < 1 << 60:
+            return int(value)
+    meminfo = _read('/proc/meminfo')
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith('MemTotal:'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def worker_count(worker_class, cpus, memory, worker_memory):
+    """
+    Number of worker processes for `worker_class`.
+
+    Sync workers block on I/O, so there are 2 per CPU plus one; gthread,
+    gevent and uvicorn workers overlap I/O themselves and need one per
+    CPU plus one. Either way no more than fit in `memory` at `worker_memory`
+    bytes each.
+    """
+    count = cpus * 2 + 1 if worker_class == 'sync' else cpus + 1
+    if memory and worker_memory:
+        count = min(count, memory // worker_memory)
+    return max(1, count)
@@ -1,11 +1,33 @@
 from storages.backends.s3boto3 import S3Boto3Storage
 
+from core.instrumentation import timed
+
 
 class SupabasePublicMediaStorage(S3Boto3Storage):
     """Custom storage to handle Supabase public URLs."""
     default_acl = 'public-read'
     file_overwrite = False
 
+    def _open(self, name, mode='rb'):
+        with timed('storage', span='storage.open', name=name):
+            return super()._open(name, mode)
+
+    def _save(self, name, content):
+        with timed('storage', span='storage.save', name=name):
+            return super()._save(name, content)
+
+    def delete(self, name):
+        with timed('storage', span='storage.delete', name=name):
+            return super().delete(name)
+
+    def exists(self, name):
+        with timed('storage', span='storage.exists', name=name):
+            return super().exists(name)
+
+    def size(self, name):
+        with timed('storage', span='storage.size', name=name):
+            return super().size(name)
+
     def url(self, name):
         if name.startswith(f"{self.bucket_name}/"):
             name = name[len(f"{self.bucket_name}/"):]
@@ -0,0 +1,293 @@
+"""
+Incremental sync of a user's books and rentals.
+
+Every save or delete of a Book or Rental appends a Change row for each
+user who can see it: the owner of a book, the renter and the book owner
+of a rental. `/api/sync/?since=<token>` reads the user's changes after
+the token through the (user, id) index, so a sync with nothing new is
+one index probe, and returns the rows still visible plus tombstones for
+the rest. Without a token, or with one older than SYNC_RETENTION, it
+returns everything the user can see and `reset` tells the client to
+replace its copy.
+
+Sequence numbers are handed out at insert, not commit, so a change may
+become visible after a higher one. On Postgres each change records its
+transaction id, and a token also carries the xmin of the snapshot it was
+read in: every transaction below it had finished, so its changes were
+seen. Changes of later transactions are sent again on the next sync,
+however long they stayed in flight, which clients apply as idempotent
+upserts. When more than a page of them sits below the token's sequence
+number, the token also carries a cursor: the last of them sent, and the
+xmin to move to once all were. Other databases have no such snapshot, so
+tokens there only move past changes older than SYNC_SETTLE_SECONDS, which
+assumes no transaction that logs changes stays open longer than that.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BigIntegerField, Func, Q
+from django.utils import timezone
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from book.serializers import BookSerializer
+from core.models import Book, Change, Rental
+from rental.serializers import RentalSerializer
+
+
+class TransactionId(Func):
+    """The id of the current transaction. Postgres 13 and later."""
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = BigIntegerField()
+
+
+class SnapshotXmin(Func):
+    """The oldest transaction still in flight for the current snapshot."""
+    template = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+    output_field = BigIntegerField()
+
+
+def uses_snapshots():
+    return connection.vendor == 'postgresql'
+
+
+def transaction_id():
+    return TransactionId() if uses_snapshots() else None
+
+
+def record(kind, object_id, user_ids, deleted=False):
+    """Log that `object_id` of `kind` changed for each of `user_ids`."""
+    txid = transaction_id()
+    Change.objects.bulk_create([
+        Change(user_id=user_id, kind=kind, object_id=object_id,
+               deleted=deleted, txid=txid)
+        for user_id in set(user_ids)
+    ])
+
+
+def _book_owner_id(rental):
+    if Rental.book.is_cached(rental):
+        return rental.book.owner_id
+    return Book.objects.filter(
+        id=rental.book_id).values_list('owner_id', flat=True).first()
+
+
+def book_changed(sender, instance, **kwargs):
+    """post_save and post_delete receiver for books."""
+    deleted = 'created' not in kwargs
+    record('book', instance.id, [instance.owner_id], deleted=deleted)
+
+
+def rental_changed(sender, instance, **kwargs):
+    """post_save and post_delete receiver for rentals."""
+    deleted = 'created' not in kwargs
+    user_ids = [instance.renter_id, _book_owner_id(instance)]
+    record('rental', instance.id, filter(None, user_ids), deleted=deleted)
+
+
+def record_rentals(ids):
+    """Log rentals changed by a bulk update, which sends no signals."""
+    rows = Rental.objects.filter(id__in=ids).values_list(
+        'id', 'renter_id', 'book__owner_id')
+    txid = transaction_id()
+    Change.objects.bulk_create([
+        Change(user_id=user_id, kind='rental', object_id=rental_id,
+               txid=txid)
+        for rental_id, renter_id, owner_id in rows
+        for user_id in {renter_id, owner_id}
+    ])
+
+
+def make_token(seq, issued=None, xmin=None, cursor=None):
+    """
+    Return a token for the changes after `seq`, and on Postgres those of
+    transactions from `xmin` on. `issued` is when those still unsent were
+    at most SYNC_SETTLE_SECONDS old, now by default. `cursor` is the
+    (change id, next xmin) reached sending changes below `seq` again.
+    """
+    if issued is None:
+        issued = int(time.time())
+    if xmin is None:
+        return f'{seq}.{issued}'
+    if cursor is None:
+        return f'{seq}.{issued}.{xmin}'
+    return f'{seq}.{issued}.{xmin}.{cursor[0]}.{cursor[1]}'
+
+
+def parse_token(token):
+    """
+    Return the (sequence number, issued, xmin, cursor) of `token`, or None
+    when changes after it may have been purged. Without a snapshot xmin, a
+    token cannot be continued on Postgres; elsewhere the xmin is unused.
+    """
+    try:
+        parts = [int(part) for part in token.split('.')]
+    except ValueError:
+        parts = []
+    if len(parts) not in (2, 3, 5):
+        raise ValidationError({'since': 'Invalid sync token.'})
+    seq, issued, xmin = (parts + [None])[:3]
+    cursor = tuple(parts[3:]) or None
+    purged = (
+        time.time() - settings.SYNC_RETENTION.total_seconds()
+        + settings.SYNC_SETTLE_SECONDS
+    )
+    if not uses_snapshots():
+        xmin = cursor = None
+    elif xmin is None:
+        return None
+    if issued < purged:
+        return None
+    return seq, issued, xmin, cursor
+
+
+class DeletedSerializer(serializers.Serializer):
+    """Ids of books and rentals deleted or no longer visible."""
+    books = serializers.ListField(child=serializers.IntegerField())
+    rentals = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    """Response of a sync."""
+    token = serializers.CharField()
+    reset = serializers.BooleanField()
+    more = serializers.BooleanField()
+    books = BookSerializer(many=True)
+    rentals = RentalSerializer(many=True)
+    deleted = DeletedSerializer()
+
+
+class SyncView(APIView):
+    """Books and rentals of the user changed since a sync token."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = SyncSerializer
+
+    def visible_books(self):
+        return Book.objects.select_related('owner').filter(
+            owner=self.request.user).order_by('id')
+
+    def visible_rentals(self):
+        user = self.request.user
+        return Rental.objects.filter(
+            Q(renter=user) | Q(book__owner=user)).order_by('id')
+
+    def respond(self, **data):
+        serializer = self.serializer_class(
+            data, context={'request': self.request})
+        return Response(serializer.data)
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        token = parse_token(since) if since else None
+        if token is None:
+            return self.snapshot()
+        return self.changes(*token)
+
+    def settled(self):
+        settle = timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        return timezone.now() - settle
+
+    def snapshot(self):
+        """Everything the user can see, with a token to continue from."""
+        changes = Change.objects.filter(
+            user=self.request.user).order_by('-id')
+        if uses_snapshots():
+            # Changes not yet visible belong to transactions from xmin on.
+            seq, xmin = changes.annotate(xmin=SnapshotXmin()).values_list(
+                'id', 'xmin').first() or (0, 0)
+        else:
+            seq = changes.filter(created_at__lte=self.settled()).values_list(
+                'id', flat=True).first() or 0
+            xmin = None
+        return self.respond(
+            token=make_token(seq, xmin=xmin),
+            reset=True,
+            more=False,
+            books=self.visible_books(),
+            rentals=self.visible_rentals(),
+            deleted={'books': [], 'rentals': []},
+        )
+
+    def settled_token(self, page, seq):
+        """The last change of `page` older than SYNC_SETTLE_SECONDS."""
+        settled = self.settled()
+        for change_id, _, _, _, created_at in page:
+            if created_at > settled:
+                break
+            seq = change_id
+        return seq
+
+    def changes(self, seq, issued, xmin=None, cursor=None):
+        """The user's changes after `seq`, at most SYNC_MAX_CHANGES."""
+        limit = settings.SYNC_MAX_CHANGES
+        changes = Change.objects.filter(user=self.request.user)
+        fields = ['id', 'kind', 'object_id', 'deleted', 'created_at']
+        after, next_xmin = cursor or (0, None)
+        if xmin is None:
+            changes = changes.filter(id__gt=seq)
+        else:
+            # Transactions in flight at the last sync may have logged
+            # changes below `seq` since; the xmin is read in the same
+            # snapshot as the changes.
+            changes = changes.filter(
+                Q(id__gt=seq) | Q(id__gt=after, txid__gte=xmin)).annotate(
+                xmin=SnapshotXmin())
+            fields.append('xmin')
+        rows = list(changes.order_by('id').values_list(
+            *fields)[:limit + 1])
+        page = rows[:limit]
+        truncated = len(rows) > limit
+        token, more = seq, False
+        if xmin is None:
+            token = self.settled_token(page, seq)
+        elif truncated and page[-1][0] <= seq:
+            # A full page of changes sent again, all below `seq`: continue
+            # after it. Changes skipped meanwhile belong to transactions
+            # from the xmin of the first such page on, so move to that.
+            cursor = page[-1][0], next_xmin or page[0][5]
+            more = True
+        else:
+            # Every change up to the end of the page is in it, or belongs
+            # to a transaction from the snapshot's xmin on.
+            if page:
+                token = max(seq, page[-1][0])
+                xmin = next_xmin or page[-1][5]
+            elif next_xmin:
+                xmin = next_xmin
+            cursor = None
+
+        # The last change of each object decides whether to fetch it.
+        latest = {'book': {}, 'rental': {}}
+        for _, kind, object_id, deleted, *_ in page:
+            latest[kind][object_id] = deleted
+        saved = {
+            kind: {pk for pk, deleted in objects.items() if not deleted}
+            for kind, objects in latest.items()
+        }
+        books = rentals = []
+        if saved['book']:
+            books = list(self.visible_books().filter(id__in=saved['book']))
+        if saved['rental']:
+            rentals = list(
+                self.visible_rentals().filter(id__in=saved['rental']))
+        # Objects no longer visible are tombstones like deleted ones.
+        deleted = {
+            'books': sorted(
+                latest['book'].keys() - {book.id for book in books}),
+            'rentals': sorted(
+                latest['rental'].keys() - {rental.id for rental in rentals}),
+        }
+        # Unsent changes past a full page may be as old as the last token.
+        more = more or truncated and token == page[-1][0] and token > seq
+        return self.respond(
+            token=make_token(token, issued if more else None, xmin, cursor),
+            reset=False,
+            more=more,
+            books=books,
+            rentals=rentals,
+            deleted=deleted,
+        )
@@ -0,0 +1,77 @@
+"""
+Tests for async serving under ASGI.
+"""
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from book.views import BookViewSet
+from core.aio import async_urlpatterns, close_connections
+from core.models import Book
+
+
+def book_patterns():
+    router = DefaultRouter()
+    router.register('books', BookViewSet)
+    return router.urls
+
+
+with override_settings(ASYNC_VIEWS_ENABLED=True):
+    urlpatterns = async_urlpatterns([
+        path('api/book/', include((book_patterns(), 'book'))),
+    ])
+
+
+def callbacks(patterns):
+    return {pattern.name: pattern.callback for pattern in patterns}
+
+
+class AsyncUrlpatternsTests(SimpleTestCase):
+    """Test which views are made async."""
+
+    def test_listed_actions_become_async(self):
+        """Test views with an ASYNC_VIEWS action are coroutines."""
+        with override_settings(ASYNC_VIEWS_ENABLED=True):
+            views = callbacks(async_urlpatterns(book_patterns()))
+
+        self.assertTrue(asyncio.iscoroutinefunction(views['book-list']))
+        self.assertTrue(asyncio.iscoroutinefunction(views['book-detail']))
+        self.assertTrue(
+            asyncio.iscoroutinefunction(views['book-upload-image']))
+        self.assertFalse(asyncio.iscoroutinefunction(views['book-mine']))
+        self.assertIs(views['book-list'].cls, BookViewSet)
+
+    def test_disabled_without_asgi(self):
+        """Test nothing changes unless ASYNC_VIEWS_ENABLED."""
+        views = callbacks(async_urlpatterns(book_patterns()))
+
+        self.assertFalse(asyncio.iscoroutinefunction(views['book-list']))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TransactionTestCase):
+    """Test async views through the ASGI handler and middleware."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'owner@example.com', 'testpass123')
+        Book.objects.create(owner=user, title='Book', author='Author')
+
+    def tearDown(self):
+        close_connections()
+
+    async def test_list_books(self):
+        """Test listing books on a pool thread, with its queries counted."""
+        res = await AsyncClient().get('/api/book/books/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()[0]['title'], 'Book')
+        self.assertIn('queries;desc="1"', res['Server-Timing'])
@@ -0,0 +1,47 @@
+"""
+Tests for the seeding command and benchmark helpers.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+
+from core.benchmark import percentile, summarize
+from core.models import Book, Rental
+
+
+class SeedScaleTests(TestCase):
+    """Test the seed_scale command."""
+
+    def test_seed_counts(self):
+        """Test the requested volumes are created consistently."""
+        call_command(
+            'seed_scale', users=5, books=20, rentals=30, stdout=StringIO())
+
+        self.assertEqual(get_user_model().objects.count(), 5)
+        self.assertEqual(Book.objects.count(), 20)
+        self.assertTrue(0 < Rental.objects.count() <= 30)
+        self.assertFalse(
+            Rental.objects.filter(renter_id=F('book__owner_id')).exists())
+        user = get_user_model().objects.get(email='bench0@example.com')
+        self.assertTrue(user.check_password('benchpass123'))
+
+
+class BenchmarkSummaryTests(SimpleTestCase):
+    """Test latency summaries."""
+
+    def test_percentile_nearest_rank(self):
+        samples = list(range(1, 101))
+
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize(self):
+        report = summarize({'book_list': [0.01, 0.02]}, {}, 2.0)
+
+        self.assertEqual(report['requests'], 2)
+        self.assertEqual(report['rps'], 1.0)
+        self.assertEqual(report['endpoints']['book_list']['p50_ms'], 10.0)
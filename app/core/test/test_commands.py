@@ -1,34 +1,109 @@
 """
 Django Custom Test Commands
 """
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Pyscopg2Error
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
 
+from core.models import Book, Rental
 
-@patch('core.management.commands.wait_for_db.Command.check')
+
+@patch('core.management.commands.wait_for_db.Command.ping')
 class CommandTests(SimpleTestCase):
     """Test Commands."""
 
-    def test_wait_for_db(self, patched_check):
+    def test_wait_for_db(self, patched_ping):
         """Test waiting for database if database is ready."""
-        patched_check.return_value = True
+        patched_ping.return_value = None
 
-        call_command('wait_for_db')
+        call_command('wait_for_db', stdout=StringIO())
 
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_ping.assert_called_once_with()
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_ping):
         """Test waiting for database when getting OperationalError"""
-        patched_check.side_effect = [Pyscopg2Error] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_ping.side_effect = [Pyscopg2Error] * 2 + \
+            [OperationalError] * 3 + [None]
+
+        call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(patched_ping.call_count, 6)
+        self.assertEqual(
+            [call.args[0] for call in patched_sleep.call_args_list],
+            [0.1, 0.2, 0.4, 0.8, 1.6],
+        )
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_ping):
+        """Test giving up once the timeout has passed."""
+        patched_ping.side_effect = Pyscopg2Error
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+    @patch('core.management.commands.wait_for_db.call_command')
+    @patch(
+        'core.management.commands.wait_for_db.Command.pending_migrations')
+    def test_migrate_only_when_pending(
+        self, patched_pending, patched_call, patched_ping
+    ):
+        """Test migrations run only when some are unapplied."""
+        patched_pending.return_value = []
+        call_command('wait_for_db', migrate=True, stdout=StringIO())
+        patched_call.assert_not_called()
+
+        patched_pending.return_value = [('migration', False)]
+        call_command('wait_for_db', migrate=True, stdout=StringIO())
+        self.assertEqual(patched_call.call_args.args, ('migrate',))
+
+
+class RentalSchedulerTests(TestCase):
+    """Test the rental scheduler command."""
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user(
+            email='owner@example.com', password='testpass123')
+        self.renter = get_user_model().objects.create_user(
+            email='renter@example.com', password='testpass123')
+        self.book = Book.objects.create(owner=owner, title='T', author='A')
+
+    def create_rental(self, **params):
+        return Rental.objects.create(
+            renter=self.renter, book=self.book, **params)
+
+    def test_marks_overdue_rentals(self):
+        """Test accepted rentals past their end date become overdue."""
+        today = timezone.localdate()
+        late = self.create_rental(
+            status='accepted', end_date=today - timedelta(days=1))
+        current = self.create_rental(status='accepted', end_date=today)
+
+        call_command('rental_scheduler', batch_size=1, stdout=StringIO())
+
+        late.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual(late.status, 'overdue')
+        self.assertEqual(current.status, 'accepted')
+
+    def test_expires_stale_pending_requests(self):
+        """Test pending requests older than the cutoff expire."""
+        stale = self.create_rental()
+        Rental.objects.filter(id=stale.id).update(
+            request_date=timezone.now() - timedelta(days=15))
+        fresh = self.create_rental(status='declined')
 
-        call_command('wait_for_db')
+        call_command('rental_scheduler', pending_days=14, stdout=StringIO())
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, 'expired')
+        self.assertEqual(fresh.status, 'declined')
@@ -0,0 +1,105 @@
+"""
+Tests for response compression.
+"""
+import gzip
+import zlib
+
+import brotli
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import compression
+from core.middleware import CompressionMiddleware
+
+BODY = b'{"title":"Book","author":"Author"}' * 100
+
+
+class NegotiateTests(SimpleTestCase):
+    """Test choosing an encoding from Accept-Encoding."""
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(compression.negotiate('gzip'), 'gzip')
+        self.assertEqual(compression.negotiate('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(compression.negotiate('br;q=0, *'), 'gzip')
+        self.assertIsNone(compression.negotiate('identity'))
+        self.assertIsNone(compression.negotiate(''))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test which responses are compressed and how."""
+
+    def call(self, response, accept='gzip', **headers):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept, **headers)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json(self, body=BODY):
+        return HttpResponse(body, content_type='application/json')
+
+    def test_gzip(self):
+        res = self.call(self.json())
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    def test_brotli(self):
+        res = self.call(self.json(), accept='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), BODY)
+
+    def test_not_accepted(self):
+        res = self.call(self.json(), accept='')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res.content, BODY)
+
+    @override_settings(COMPRESSION_MIN_BYTES=10000)
+    def test_below_threshold(self):
+        res = self.call(self.json())
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, BODY)
+
+    def test_other_types_and_encoded_skipped(self):
+        image = HttpResponse(BODY, content_type='image/jpeg')
+        encoded = self.json(gzip.compress(BODY))
+        encoded['Content-Encoding'] = 'gzip'
+
+        self.assertEqual(self.call(image).content, BODY)
+        self.assertEqual(
+            gzip.decompress(self.call(encoded).content), BODY)
+
+    def test_strong_etag_weakened(self):
+        response = self.json()
+        response['ETag'] = '"abc"'
+
+        self.assertEqual(self.call(response)['ETag'], 'W/"abc"')
+
+    def test_streaming(self):
+        """Test each streamed chunk can be decoded as it arrives."""
+        chunks = [b'data: one\n\n', b'data: two\n\n']
+        response = StreamingHttpResponse(
+            iter(chunks), content_type='text/event-stream')
+
+        res = self.call(response)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(res.has_header('Content-Length'))
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parts = [decoder.decompress(part) for part in res.streaming_content]
+        self.assertEqual(parts[:2], chunks)
+        self.assertEqual(b''.join(parts), b''.join(chunks))
+
+    def test_streaming_brotli(self):
+        response = StreamingHttpResponse(
+            iter([BODY, BODY]), content_type='application/json')
+
+        res = self.call(response, accept='br')
+
+        self.assertEqual(
+            brotli.decompress(b''.join(res.streaming_content)), BODY * 2)
@@ -0,0 +1,146 @@
+"""
+Tests for the connection pool and the PostgreSQL backend's health checks.
+"""
+import threading
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+from psycopg2 import extensions
+
+from core.db.backends.postgresql.base import DatabaseWrapper, usable
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool
+
+
+def pg_settings(**extra):
+    return {
+        'ENGINE': 'core.db.backends.postgresql', 'NAME': 'test', 'USER': '',
+        'PASSWORD': '', 'HOST': '', 'PORT': '', 'OPTIONS': {},
+        'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False, 'CONN_MAX_AGE': 60,
+        'TIME_ZONE': None, 'TEST': {}, **extra,
+    }
+
+
+def fake_conn(closed=0, status=extensions.TRANSACTION_STATUS_IDLE):
+    conn = Mock(closed=closed)
+    conn.get_transaction_status.return_value = status
+    return conn
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the in-process connection pool."""
+
+    def test_reuses_returned_connection(self):
+        """Test a returned connection is handed out instead of a new one."""
+        pool = ConnectionPool('default', 2, 1, lambda conn: True)
+        connect = Mock(side_effect=lambda: object())
+
+        first = pool.get(connect)
+        pool.put(first)
+        second = pool.get(connect)
+
+        self.assertIs(first, second)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_replaces_connection_failing_check(self):
+        """Test an unusable idle connection is closed and replaced."""
+        pool = ConnectionPool('default', 1, 1, lambda conn: not conn.closed)
+        stale = fake_conn()
+        pool.put(pool.get(lambda: stale))
+        stale.closed = 1
+
+        conn = pool.get(fake_conn)
+
+        self.assertIsNot(conn, stale)
+        stale.close.assert_called_once()
+
+    def test_discarded_connection_frees_its_slot(self):
+        """Test discarding a connection closes it and frees its slot."""
+        pool = ConnectionPool('default', 1, 0.01, lambda conn: True)
+        conn = pool.get(fake_conn)
+
+        pool.put(conn, discard=True)
+
+        conn.close.assert_called_once()
+        self.assertIsNot(pool.get(fake_conn), conn)
+
+    def test_waits_then_times_out_when_exhausted(self):
+        """Test get() blocks for a free slot and then raises PoolTimeout."""
+        pool = ConnectionPool('default', 1, 0.05, lambda conn: True)
+        conn = pool.get(fake_conn)
+
+        with self.assertRaises(PoolTimeout):
+            pool.get(fake_conn)
+
+        timer = threading.Timer(0.01, pool.put, [conn])
+        timer.start()
+        pool.timeout = 5
+        self.assertIs(pool.get(fake_conn), conn)
+        timer.join()
+
+    def test_failed_connect_frees_its_slot(self):
+        """Test a failing connect() does not leak a slot."""
+        pool = ConnectionPool('default', 1, 0.01, lambda conn: True)
+
+        with self.assertRaises(OSError):
+            pool.get(Mock(side_effect=OSError))
+
+        pool.get(fake_conn)
+
+    def test_get_pool_disabled_without_size(self):
+        """Test no pool is used unless POOL.MAX_SIZE is set."""
+        self.assertIsNone(get_pool('default', pg_settings(), usable))
+        pool = get_pool(
+            'default', pg_settings(POOL={'MAX_SIZE': 3}), usable)
+        self.assertEqual(pool.max_size, 3)
+        self.assertIs(pool, get_pool(
+            'default', pg_settings(POOL={'MAX_SIZE': 3}), usable))
+
+
+class PostgresBackendTests(SimpleTestCase):
+    """Test the backend's health checks and pool hand-off."""
+
+    def test_usable(self):
+        """Test idle, open connections are usable."""
+        self.assertTrue(usable(fake_conn()))
+        self.assertFalse(usable(fake_conn(closed=1)))
+        self.assertFalse(usable(
+            fake_conn(status=extensions.TRANSACTION_STATUS_INERROR)))
+
+    def test_health_check_replaces_dead_connection(self):
+        """Test a dropped connection is replaced once per request."""
+        wrapper = DatabaseWrapper(pg_settings(CONN_HEALTH_CHECKS=True))
+        dead = fake_conn()
+        wrapper.connection, wrapper.autocommit = dead, True
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(wrapper, 'is_usable', return_value=False), \
+                patch.object(wrapper, 'connect') as connect:
+            wrapper.ensure_connection()
+
+        dead.close.assert_called_once()
+        connect.assert_called_once()
+
+    def test_health_check_runs_once_per_request(self):
+        """Test a healthy connection is only pinged on first use."""
+        wrapper = DatabaseWrapper(pg_settings(CONN_HEALTH_CHECKS=True))
+        wrapper.connection, wrapper.autocommit = fake_conn(), True
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(wrapper, 'is_usable', return_value=True) as check:
+            wrapper.ensure_connection()
+            wrapper.ensure_connection()
+
+        check.assert_called_once()
+
+    def test_close_returns_connection_to_pool(self):
+        """Test closing a pooled connection rolls back and keeps it."""
+        wrapper = DatabaseWrapper(
+            pg_settings(NAME='pooled', POOL={'MAX_SIZE': 1}))
+        conn = fake_conn(status=extensions.TRANSACTION_STATUS_INTRANS)
+        wrapper.connection = wrapper.pool.get(lambda: conn)
+
+        wrapper.close()
+
+        conn.rollback.assert_called_once()
+        conn.close.assert_not_called()
+        self.assertEqual(list(wrapper.pool.idle), [conn])
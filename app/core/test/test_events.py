@@ -0,0 +1,218 @@
+"""
+Tests for rental event streams.
+"""
+import asyncio
+import json
+from unittest import skipUnless
+
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import events
+from core.aio import close_connections, run_sync
+from core.models import Book, Rental
+
+EVENTS_PATH = '/api/rental/events/'
+ORIGIN = b'https://app.example.com'
+
+
+async def django_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def scope(user=None, path=EVENTS_PATH, method='GET', headers=()):
+    headers = list(headers)
+    if user is not None:
+        token = RefreshToken.for_user(user).access_token
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    return {
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': b'', 'headers': headers,
+    }
+
+
+@override_settings(EVENTS_BROKER='local', EVENTS_KEEPALIVE_SECONDS=5)
+class EventStreamTests(TransactionTestCase):
+    """Test streaming rental events through the ASGI app."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(
+            'owner@example.com', 'testpass123')
+        self.renter = User.objects.create_user(
+            'renter@example.com', 'testpass123')
+        self.book = Book.objects.create(
+            owner=self.owner, title='Book', author='Author')
+        self.rental = Rental.objects.create(
+            renter=self.renter, book=self.book)
+
+    def tearDown(self):
+        close_connections()
+
+    def open(self, scope):
+        return ApplicationCommunicator(
+            events.EventStreamApp(django_app), scope)
+
+    async def start(self, user):
+        """Open a stream of `user` and read up to the retry hint."""
+        app = self.open(scope(user))
+        await app.send_input({'type': 'http.request'})
+        start = await app.receive_output(5)
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'), start['headers'])
+        first = await app.receive_output(1)
+        self.assertTrue(first['body'].startswith(b'retry: '))
+        return app
+
+    async def close(self, *apps):
+        for app in apps:
+            await app.send_input({'type': 'http.disconnect'})
+            await app.wait(1)
+        self.assertEqual(len(events.hub), 0)
+
+    async def test_other_paths_reach_django(self):
+        """Test requests for other paths are passed on."""
+        app = self.open(scope(path='/api/book/books/'))
+        await app.send_input({'type': 'http.request'})
+
+        self.assertEqual((await app.receive_output(1))['status'], 204)
+
+    async def test_unauthenticated(self):
+        """Test streams need a valid bearer token."""
+        app = self.open(scope())
+        await app.send_input({'type': 'http.request'})
+
+        self.assertEqual((await app.receive_output(5))['status'], 401)
+
+    async def test_preflight(self):
+        """Test CORS preflights are answered without credentials."""
+        app = self.open(scope(method='OPTIONS', headers=[
+            (b'origin', ORIGIN),
+            (b'access-control-request-method', b'GET'),
+            (b'access-control-request-headers', b'authorization'),
+        ]))
+        await app.send_input({'type': 'http.request'})
+
+        start = await app.receive_output(5)
+        headers = dict(start['headers'])
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(headers[b'access-control-allow-origin'], b'*')
+        self.assertIn(
+            b'authorization', headers[b'access-control-allow-headers'])
+        self.assertIn(b'GET', headers[b'access-control-allow-methods'])
+
+    @override_settings(
+        CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOWED_ORIGINS=[ORIGIN.decode()])
+    async def test_cors_headers(self):
+        """Test streams and errors allow the configured origins only."""
+        app = self.open(scope(self.renter, headers=[(b'origin', ORIGIN)]))
+        await app.send_input({'type': 'http.request'})
+        stream = dict((await app.receive_output(5))['headers'])
+        await self.close(app)
+        app = self.open(scope(headers=[(b'origin', ORIGIN)]))
+        await app.send_input({'type': 'http.request'})
+        error = dict((await app.receive_output(5))['headers'])
+        app = self.open(scope(headers=[(b'origin', b'https://evil.com')]))
+        await app.send_input({'type': 'http.request'})
+        other = dict((await app.receive_output(5))['headers'])
+
+        self.assertEqual(stream[b'access-control-allow-origin'], ORIGIN)
+        self.assertEqual(stream[b'vary'], b'origin')
+        self.assertEqual(error[b'access-control-allow-origin'], ORIGIN)
+        self.assertNotIn(b'access-control-allow-origin', other)
+
+    async def test_transitions_reach_renter_and_owner(self):
+        """Test accepting a rental pushes its status to both parties."""
+        renter = await self.start(self.renter)
+        owner = await self.start(self.owner)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        res = await run_sync(
+            client.post,
+            reverse('rental:rental-accept', args=[self.rental.id]))
+
+        self.assertEqual(res.status_code, 200)
+        expected = (
+            b'event: rental\ndata: {"id":%d,"book":%d,"status":"accepted"}'
+            b'\n\n' % (self.rental.id, self.book.id))
+        self.assertEqual((await renter.receive_output(1))['body'], expected)
+        self.assertEqual((await owner.receive_output(1))['body'], expected)
+        await self.close(renter, owner)
+
+    async def test_rolled_back_events_are_not_sent(self):
+        """Test events are only sent once their transaction commits."""
+        app = await self.start(self.renter)
+
+        def publish(status, commit):
+            with transaction.atomic():
+                self.rental.status = status
+                events.publish(self.rental, self.owner.id)
+                transaction.set_rollback(not commit)
+
+        await run_sync(publish, 'declined', False)
+        await run_sync(publish, 'accepted', True)
+
+        body = (await app.receive_output(1))['body']
+        self.assertIn(b'"accepted"', body)
+        self.assertNotIn(b'"declined"', body)
+        await self.close(app)
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    async def test_slow_client_gets_reset(self):
+        """Test a stream that falls behind is told to resync."""
+        app = await self.start(self.renter)
+        for status in ('accepted', 'returned', 'pending'):
+            events.hub.dispatch(json.dumps({
+                'users': [self.renter.id],
+                'event': {'id': 1, 'book': 1, 'status': status},
+            }))
+        subscription, = events.hub.subscriptions[self.renter.id]
+        self.assertEqual(len(subscription.events), 2)
+
+        self.assertEqual(
+            (await app.receive_output(1))['body'], b'event: reset\n\n')
+        await self.close(app)
+
+    @override_settings(EVENTS_KEEPALIVE_SECONDS=0.01, EVENTS_MAX_SECONDS=0.05)
+    async def test_keepalive_and_end(self):
+        """Test idle streams send comments and end after a while."""
+        app = await self.start(self.renter)
+
+        self.assertEqual(
+            (await app.receive_output(1))['body'], b': keepalive\n\n')
+        while True:
+            message = await app.receive_output(1)
+            if not message.get('more_body'):
+                break
+        await app.wait(1)
+        self.assertEqual(len(events.hub), 0)
+
+    @override_settings(EVENTS_MAX_CONNECTIONS=1)
+    async def test_connection_limit(self):
+        """Test streams beyond EVENTS_MAX_CONNECTIONS are refused."""
+        first = await self.start(self.renter)
+        app = self.open(scope(self.owner))
+        await app.send_input({'type': 'http.request'})
+
+        self.assertEqual((await app.receive_output(5))['status'], 503)
+        await self.close(first)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs Postgres.')
+@override_settings(EVENTS_BROKER='postgres')
+class PostgresBrokerTests(EventStreamTests):
+    """Run the stream tests through LISTEN/NOTIFY."""
+
+    async def start(self, user):
+        app = await super().start(user)
+        # Give the listener time to connect and LISTEN.
+        await asyncio.sleep(0.5)
+        return app
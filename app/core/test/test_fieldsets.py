@@ -0,0 +1,156 @@
+"""
+Tests for sparse fieldsets.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.fieldsets import parse
+from core.models import Book, Rental
+
+BOOKS_URL = reverse('book:book-list')
+MY_RENTALS_URL = reverse('rental:rental-mine')
+
+
+class ParseTests(SimpleTestCase):
+    """Test parsing `?fields=` and `?expand=` values."""
+
+    def test_parse(self):
+        self.assertEqual(parse('id, owner.email,owner.id,title'), {
+            'id': {}, 'title': {}, 'owner': {'email': {}, 'id': {}},
+        })
+
+    def test_parse_empty(self):
+        self.assertIsNone(parse(''))
+        self.assertIsNone(parse(' , '))
+
+
+class SparseFieldsetApiTests(TestCase):
+    """Test trimmed responses and the queries behind them."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(
+            'owner@example.com', 'testpass123', first_name='Owner')
+        self.renter = User.objects.create_user(
+            'renter@example.com', 'testpass123', first_name='Renter')
+        self.book = Book.objects.create(
+            owner=self.owner, title='Book', author='Author',
+            description='A long description.')
+        self.rental = Rental.objects.create(
+            renter=self.renter, book=self.book)
+        self.client = APIClient()
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, 200)
+        return res, [q['sql'] for q in ctx.captured_queries]
+
+    def test_default_unchanged(self):
+        """Test responses without parameters keep every field."""
+        res = self.client.get(BOOKS_URL)
+
+        self.assertIn('description', res.json()[0])
+        self.assertEqual(res.json()[0]['owner']['first_name'], 'Owner')
+
+    def test_fields_trim_response_and_columns(self):
+        """Test `fields` trims the JSON and the SELECT, without a join."""
+        res, queries = self.get(BOOKS_URL, {'fields': 'id,title,author'})
+
+        self.assertEqual(res.json(), [
+            {'id': self.book.id, 'title': 'Book', 'author': 'Author'},
+        ])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0])
+        self.assertNotIn('JOIN', queries[0])
+
+    def test_nested_fields(self):
+        """Test dotted fields select inside the nested owner."""
+        res, queries = self.get(
+            reverse('book:book-detail', args=[self.book.id]),
+            {'fields': 'title,owner.first_name'})
+
+        self.assertEqual(
+            res.json(), {'title': 'Book', 'owner': {'first_name': 'Owner'}})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('JOIN', queries[0])
+        self.assertNotIn('"email"', queries[0])
+
+    def test_expand_rental(self):
+        """Test `expand` embeds the book and renter in one query."""
+        token = RefreshToken.for_user(self.renter).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        res, queries = self.get(MY_RENTALS_URL, {
+            'expand': 'book.owner,renter',
+            'fields': 'id,book.title,book.owner.email,renter',
+        })
+
+        self.assertEqual(res.json(), [{
+            'id': self.rental.id,
+            'book': {
+                'title': 'Book', 'owner': {'email': 'owner@example.com'}},
+            'renter': {
+                'id': self.renter.id, 'email': 'renter@example.com',
+                'first_name': 'Renter', 'last_name': ''},
+        }])
+        # Authentication, then the rentals with all three joins.
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"author"', queries[1])
+        self.assertNotIn('"message"', queries[1])
+
+    def test_unknown_nested_field_rejected(self):
+        """Test names missing under an expanded field are a 400."""
+        token = RefreshToken.for_user(self.renter).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        res = self.client.get(
+            MY_RENTALS_URL, {'expand': 'book', 'fields': 'book.owner'})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.json(), {'fields': ['Unknown field: book.owner.']})
+
+    def test_unknown_fields_rejected(self):
+        """Test names matching no field are listed in a 400."""
+        res = self.client.get(BOOKS_URL, {
+            'fields': 'bogus,title.x,owner.bogus,owner.email'})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json(), {'fields': [
+            'Unknown field: bogus.', 'Unknown field: title.x.']})
+
+        res = self.client.get(BOOKS_URL, {'fields': 'owner.bogus'})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.json(), {'fields': ['Unknown field: owner.bogus.']})
+
+    def test_unknown_expand_rejected(self):
+        """Test `expand` names that cannot be expanded are a 400."""
+        token = RefreshToken.for_user(self.renter).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        res = self.client.get(MY_RENTALS_URL, {'expand': 'book,bogus'})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.json(), {'expand': ['Unknown field: bogus.']})
+
+    def test_ignored_on_writes(self):
+        """Test write responses keep every field."""
+        token = RefreshToken.for_user(self.owner).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        res = self.client.patch(
+            reverse('book:book-detail', args=[self.book.id]) + '?fields=id',
+            {'title': 'New'}, format='json')
+
+        self.assertEqual(res.json()['title'], 'New')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.description, 'A long description.')
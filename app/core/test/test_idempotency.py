@@ -0,0 +1,162 @@
+"""
+Tests for Idempotency-Key support on write endpoints.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Book, IdempotencyKey, Rental
+
+
+BOOKS_URL = reverse('book:book-list')
+RENTAL_URL = reverse('rental:rental-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Helper function to create a user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+class IdempotencyKeyTests(TestCase):
+    """Test replaying write requests sent with an Idempotency-Key."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.payload = {'title': 'Clean Code', 'author': 'Robert Martin'}
+
+    def test_retry_replays_first_response(self):
+        """Test a retry with the same key does not run the view again."""
+        res1 = self.client.post(
+            BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+        res2 = self.client.post(
+            BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.data, res1.data)
+        self.assertEqual(res2['Idempotent-Replayed'], 'true')
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_different_keys_run_view(self):
+        """Test requests with different keys are both executed."""
+        self.client.post(BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='a')
+        self.client.post(BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='b')
+
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_key_scoped_per_endpoint(self):
+        """Test the same key on another endpoint is not replayed."""
+        owner = create_user(email='owner@example.com')
+        book = Book.objects.create(owner=owner, title='T', author='A')
+
+        self.client.post(BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='k')
+        res = self.client.post(
+            RENTAL_URL, {'book': book.id}, HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Rental.objects.count(), 1)
+
+    def test_failed_request_releases_key(self):
+        """Test a request that raised can be retried with the same key."""
+        book = Book.objects.create(owner=self.user, title='T', author='A')
+
+        res = self.client.post(
+            RENTAL_URL, {'book': book.id}, HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key_runs_view(self):
+        """Test an expired key is treated as a new request."""
+        self.client.post(BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='k')
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+
+        self.client.post(BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(Book.objects.count(), 2)
+
+    def placeholder(self, age=timedelta()):
+        """A key of a books POST still in progress, started `age` ago."""
+        record = IdempotencyKey.objects.create(
+            user=self.user, key='k', endpoint=f'POST {BOOKS_URL}',
+            expires_at=timezone.now() + timedelta(days=1))
+        IdempotencyKey.objects.filter(id=record.id).update(
+            created_at=timezone.now() - age)
+        return record
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT=0)
+    def test_duplicate_in_progress_conflicts(self):
+        """Test a duplicate of a request still running gets a 409."""
+        self.placeholder()
+
+        res = self.client.post(
+            BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Book.objects.exists())
+
+    def test_duplicate_waits_for_response(self):
+        """Test a duplicate replays the response once it is stored."""
+        record = self.placeholder()
+
+        def finish(seconds):
+            IdempotencyKey.objects.filter(id=record.id).update(
+                status_code=201, response={'id': 1})
+
+        with mock.patch('core.idempotency.time.sleep', side_effect=finish):
+            res = self.client.post(
+                BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'id': 1})
+        self.assertEqual(res['Idempotent-Replayed'], 'true')
+        self.assertFalse(Book.objects.exists())
+
+    @override_settings(IDEMPOTENCY_LOCK_LEASE=timedelta(seconds=30))
+    def test_abandoned_key_claimed_again(self):
+        """Test a key left in progress by a killed worker is taken over."""
+        record = self.placeholder(age=timedelta(minutes=1))
+        stale = IdempotencyKey.objects.filter(
+            id=record.id, created_at=IdempotencyKey.objects.get(
+                id=record.id).created_at)
+
+        res = self.client.post(
+            BOOKS_URL, self.payload, HTTP_IDEMPOTENCY_KEY='k')
+        # The killed request cannot overwrite the new response.
+        stale.update(status_code=500)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 1)
+        record.refresh_from_db()
+        self.assertEqual(record.status_code, 201)
+        self.assertEqual(record.response['id'], res.data['id'])
+
+    def test_purge_expired_keys(self):
+        """Test the purge command deletes only expired keys."""
+        now = timezone.now()
+        for i in range(3):
+            IdempotencyKey.objects.create(
+                user=self.user, key=f'old{i}', endpoint='POST /',
+                expires_at=now - timedelta(minutes=1),
+            )
+        IdempotencyKey.objects.create(
+            user=self.user, key='fresh', endpoint='POST /',
+            expires_at=now + timedelta(hours=1),
+        )
+
+        call_command('purge_idempotency_keys', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list('key', flat=True)),
+            ['fresh']
+        )
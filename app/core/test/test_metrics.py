@@ -0,0 +1,74 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from core.models import Book, Rental
+
+
+METRICS_URL = reverse('metrics')
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    """Test request and rental metrics."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_request_latency_labeled_by_view_action(self):
+        """Test requests are recorded per DRF view and action."""
+        self.client.get(reverse('book:book-list'))
+
+        res = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(
+            b'http_request_duration_seconds_count{method="GET",'
+            b'status="200",view="BookViewSet.list"}',
+            res.content
+        )
+        self.assertIn(b'http_request_db_queries_bucket', res.content)
+
+    def test_rental_transition_counted(self):
+        """Test accepting a rental increments the transition counter."""
+        owner = get_user_model().objects.create_user(
+            'owner@example.com', 'testpass123')
+        renter = get_user_model().objects.create_user(
+            'renter@example.com', 'testpass123')
+        book = Book.objects.create(owner=owner, title='T', author='A')
+        rental = Rental.objects.create(renter=renter, book=book)
+        labels = {'status': 'accepted'}
+        before = REGISTRY.get_sample_value(
+            'rental_transitions_total', labels) or 0
+
+        self.client.force_authenticate(owner)
+        self.client.post(reverse('rental:rental-accept', args=[rental.id]))
+
+        self.assertEqual(
+            REGISTRY.get_sample_value('rental_transitions_total', labels),
+            before + 1
+        )
+
+    def test_token_required(self):
+        """Test the endpoint rejects scrapes without the bearer token."""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer other')
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_closed_without_token(self):
+        """Test nothing can be scraped until a token is configured."""
+        for auth in ('', 'Bearer ', 'Bearer'):
+            res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION=auth)
+            self.assertEqual(res.status_code, 403)
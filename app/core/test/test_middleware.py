@@ -0,0 +1,59 @@
+"""
+Tests for the request timing middleware.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import instrumentation
+from core.models import Book
+
+
+BOOKS_URL = reverse('book:book-list')
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Test per-request SQL and timing instrumentation."""
+
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        Book.objects.create(owner=user, title='T', author='A')
+
+    def test_server_timing_header(self):
+        """Test DB, serializer and total time are reported."""
+        res = self.client.get(BOOKS_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('serializer;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        self.assertIn('queries;desc="1"', timing)
+
+    @override_settings(REQUEST_TIMING_SLOW_QUERIES=1)
+    def test_slow_request_logged(self):
+        """Test requests above the thresholds are logged as JSON."""
+        with self.assertLogs('core.timing', level='WARNING') as logs:
+            self.client.get(BOOKS_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], BOOKS_URL)
+        self.assertEqual(record['queries'], 1)
+        self.assertIn('db', record['ms'])
+
+    def test_timed_nested_blocks_counted_once(self):
+        """Test nested timed blocks do not double count."""
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.activate(metrics)
+        try:
+            with instrumentation.timed('storage'):
+                with instrumentation.timed('storage'):
+                    pass
+        finally:
+            instrumentation.deactivate(token)
+
+        self.assertEqual(list(metrics.durations), ['storage'])
@@ -0,0 +1,44 @@
+"""
+Tests for data migrations.
+"""
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class CompactEnumsContractTests(TransactionTestCase):
+    """Test the contract step catches writes made after the backfill."""
+
+    before = [('core', '0006_compact_enums_backfill')]
+    after = [('core', '0007_compact_enums_contract')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_codes_recomputed_before_swap(self):
+        """Test rows written by the old release keep their values."""
+        apps = self.migrate(self.before)
+        User = apps.get_model('core', 'User')
+        Book = apps.get_model('core', 'Book')
+        Rental = apps.get_model('core', 'Rental')
+        owner = User.objects.create(email='owner@example.com')
+        # As the old release writes them: no code, or a stale one.
+        book = Book.objects.create(
+            owner=owner, title='Book', author='Author', condition='poor')
+        rental = Rental.objects.create(
+            renter=owner, book=book, status='returned', status_code=0)
+
+        apps = self.migrate(self.after)
+
+        Book = apps.get_model('core', 'Book')
+        Rental = apps.get_model('core', 'Rental')
+        self.assertEqual(Book.objects.get(id=book.id).condition, 'poor')
+        self.assertEqual(
+            Rental.objects.get(id=rental.id).status, 'returned')
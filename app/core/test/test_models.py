@@ -1,6 +1,7 @@
 """
 Tests for Models
 """
+from django.db import connection
 from django.test import TestCase
 from core import models
 from django.contrib.auth import get_user_model
@@ -71,7 +72,7 @@ class BookModelTests(TestCase):
             title='Clean Code',
             author='Robert C. Martin',
             description='A Handbook of Agile Software Craftsmanship',
-            condition='Good'
+            condition='good'
         )
 
         self.assertEqual(str(book), book.title)
@@ -84,8 +85,40 @@ class BookModelTests(TestCase):
             title='Refactoring',
             author='Martin Fowler',
             description='',
-            condition='Fair'
+            condition='fair'
         )
 
         self.assertEqual(book.description, '')
         self.assertTrue(book.is_available)
+
+    def test_condition_stored_as_small_integer(self):
+        """Test condition is stored as a code but read back as a string."""
+        user = create_user()
+        book = models.Book.objects.create(
+            owner=user,
+            title='Refactoring',
+            author='Martin Fowler',
+            condition='like_new'
+        )
+
+        raw = models.Book.objects.filter(id=book.id).values_list(
+            'condition', flat=True).query
+        with connection.cursor() as cursor:
+            cursor.execute(*raw.sql_with_params())
+            self.assertEqual(cursor.fetchone()[0], 1)
+        book.refresh_from_db()
+        self.assertEqual(book.condition, 'like_new')
+        self.assertTrue(
+            models.Book.objects.filter(condition='like_new').exists())
+
+    def test_unknown_condition_rejected(self):
+        """Test saving a value outside the choices raises an error."""
+        user = create_user()
+
+        with self.assertRaises(ValueError):
+            models.Book.objects.create(
+                owner=user,
+                title='Refactoring',
+                author='Martin Fowler',
+                condition='mint'
+            )
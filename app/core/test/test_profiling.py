@@ -0,0 +1,96 @@
+"""
+Tests for on-demand request profiling.
+"""
+import os
+import pstats
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import (
+    APIClient, APIRequestFactory, force_authenticate,
+)
+from rest_framework.views import APIView
+
+from core import profiling
+
+
+BOOKS_URL = reverse('book:book-list')
+
+
+class CrashingView(profiling.ProfiledViewMixin, APIView):
+
+    def get(self, request):
+        raise RuntimeError('boom')
+
+
+class ProfilingTests(TestCase):
+    """Test profiling selected requests."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            PROFILE_DIR=self.dir.name,
+            PROFILE_SAMPLE_RATE=0,
+            PROFILE_MAX_PER_MINUTE=1,
+        )
+        self.settings.enable()
+        profiling.limiter = profiling.RateLimiter()
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+
+    def tearDown(self):
+        self.settings.disable()
+        self.dir.cleanup()
+
+    def test_staff_header_profiles_request(self):
+        """Test a staff request with the header writes a pstats file."""
+        self.client.force_authenticate(self.staff)
+
+        res = self.client.get(BOOKS_URL, HTTP_X_PROFILE='1')
+
+        name = res['X-Profile-Id']
+        self.assertTrue(name.startswith('BookViewSet.list-'))
+        pstats.Stats(os.path.join(self.dir.name, name))
+
+    def test_header_ignored_for_non_staff(self):
+        """Test regular users cannot trigger profiling."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(BOOKS_URL, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_rate_limited(self):
+        """Test profiles beyond the per-minute limit are skipped."""
+        self.client.force_authenticate(self.staff)
+
+        self.client.get(BOOKS_URL, HTTP_X_PROFILE='1')
+        res = self.client.get(BOOKS_URL, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(len(os.listdir(self.dir.name)), 1)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_request_profiled(self):
+        """Test sampling profiles anonymous requests too."""
+        res = self.client.get(BOOKS_URL)
+
+        self.assertIn('X-Profile-Id', res)
+
+    def test_unhandled_exception_stops_profiler(self):
+        """Test a crashing request still stops profiling and frees the slot."""
+        request = APIRequestFactory().get('/', HTTP_X_PROFILE='1')
+        force_authenticate(request, self.staff)
+
+        with self.assertRaises(RuntimeError):
+            CrashingView.as_view()(request)
+
+        self.assertIsNone(sys.getprofile())
+        self.assertFalse(profiling.limiter.active.locked())
@@ -0,0 +1,212 @@
+"""
+Query-count and query-shape regression tests for every API route.
+
+Each route is called at two dataset sizes. The number of SQL queries must
+not grow with the size of the result and must match the checked-in
+baseline of the database in use, as must the normalized SQL of each
+query. Refresh the baseline after an intended change with `python
+manage.py update_query_baseline`, on SQLite and on Postgres (e.g.
+`docker-compose run --rm app sh -c "python manage.py
+update_query_baseline"`), which records the database it runs against.
+"""
+import io
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Book, Rental
+
+
+BASELINE_PATH = Path(__file__).with_name('query_baseline.json')
+UPDATE_ENV = 'QUERY_BASELINE_UPDATE'
+SMALL, LARGE = 2, 6
+PASSWORD = 'testpass123'
+
+
+def normalize(sql):
+    """Strip literals and savepoint ids so only the query shape is left."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'"s\d+_x\d+"', '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\?(?:, \?)*\)', '(...)', sql)
+    return ' '.join(sql.split())
+
+
+def route_names(patterns=None, namespace=''):
+    """Yield the namespaced name of every named, non-admin route."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = namespace
+            if pattern.namespace:
+                prefix += pattern.namespace + ':'
+            yield from route_names(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield namespace + pattern.name
+
+
+def image_file():
+    buf = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(buf, format='JPEG')
+    buf.name = 'cover.jpg'
+    buf.seek(0)
+    return buf
+
+
+def book_payload(ctx):
+    return {'title': 'New', 'author': 'Author', 'condition': 'good'}
+
+
+# (route name, method, acting user or 'scraper', object in the url, payload)
+SCENARIOS = [
+    ('api-schema', 'GET', None, None, None),
+    ('api-docs', 'GET', None, None, None),
+    ('metrics', 'GET', 'scraper', None, None),
+    ('token_obtain_pair', 'POST', None, None,
+     lambda ctx: {'email': ctx['owner'].email, 'password': PASSWORD}),
+    ('token_refresh', 'POST', None, None,
+     lambda ctx: {'refresh': ctx['refresh']}),
+    ('user:create', 'POST', None, None,
+     lambda ctx: {'email': 'new@example.com', 'password': PASSWORD,
+                  'first_name': 'New', 'last_name': 'User'}),
+    ('user:login', 'POST', None, None,
+     lambda ctx: {'email': ctx['owner'].email, 'password': PASSWORD}),
+    ('user:token_refresh', 'POST', None, None,
+     lambda ctx: {'refresh': ctx['refresh']}),
+    ('user:me', 'GET', 'owner', None, None),
+    ('user:me', 'PATCH', 'owner', None, lambda ctx: {'first_name': 'X'}),
+    ('book:api-root', 'GET', None, None, None),
+    ('book:book-list', 'GET', None, None, None),
+    ('book:book-list', 'POST', 'owner', None, book_payload),
+    ('book:book-detail', 'GET', None, 'book', None),
+    ('book:book-detail', 'PUT', 'owner', 'book', book_payload),
+    ('book:book-detail', 'PATCH', 'owner', 'book',
+     lambda ctx: {'title': 'X'}),
+    ('book:book-detail', 'DELETE', 'owner', 'book', None),
+    ('book:book-mine', 'GET', 'owner', None, None),
+    ('book:book-batch', 'GET', None, None,
+     lambda ctx: {
+         'ids': f'{ctx["book"].id},{ctx["pending"].book_id},999999'}),
+    ('book:book-batch', 'POST', None, None,
+     lambda ctx: {'ids': [ctx['book'].id, ctx['accepted'].book_id]}),
+    ('book:book-upload-image', 'POST', 'owner', 'book',
+     lambda ctx: {'image': image_file()}),
+    ('rental:api-root', 'GET', None, None, None),
+    ('rental:rental-list', 'GET', 'owner', None, None),
+    ('rental:rental-list', 'POST', 'renter', None,
+     lambda ctx: {'book': ctx['book'].id}),
+    ('rental:rental-detail', 'GET', 'owner', 'pending', None),
+    ('rental:rental-detail', 'PATCH', 'owner', 'pending',
+     lambda ctx: {'message': 'X'}),
+    ('rental:rental-detail', 'DELETE', 'owner', 'pending', None),
+    ('rental:rental-mine', 'GET', 'renter', None, None),
+    ('rental:rental-accept', 'POST', 'owner', 'pending', None),
+    ('rental:rental-decline', 'POST', 'owner', 'pending', None),
+    ('rental:rental-mark-as-returned', 'POST', 'owner', 'accepted', None),
+    ('sync', 'GET', 'owner', None, None),
+]
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), METRICS_TOKEN='scrape')
+class QueryCountTests(TestCase):
+    """Record query counts and shapes for every route."""
+
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.ctx = {
+            'owner': User.objects.create_user(
+                'owner@example.com', PASSWORD),
+            'renter': User.objects.create_user(
+                'renter@example.com', PASSWORD),
+        }
+        self.ctx['refresh'] = str(RefreshToken.for_user(self.ctx['owner']))
+        self.ctx['book'] = self.add_book()
+        self.ctx['pending'] = Rental.objects.create(
+            renter=self.ctx['renter'], book=self.add_book())
+        self.ctx['accepted'] = Rental.objects.create(
+            renter=self.ctx['renter'], book=self.add_book(),
+            status='accepted')
+
+    def add_book(self):
+        return Book.objects.create(
+            owner=self.ctx['owner'], title='Book', author='Author')
+
+    def grow(self, size):
+        """Give every list at least `size` more rows."""
+        for _ in range(size):
+            Rental.objects.create(
+                renter=self.ctx['renter'], book=self.add_book(),
+                status='returned')
+
+    def capture(self, name, method, role, arg, payload):
+        url = reverse(name, args=[self.ctx[arg].id] if arg else None)
+        self.client.credentials()
+        if role == 'scraper':
+            self.client.credentials(HTTP_AUTHORIZATION='Bearer scrape')
+        elif role:
+            token = RefreshToken.for_user(self.ctx[role]).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        data = payload(self.ctx) if payload else None
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                res = getattr(self.client, method.lower())(url, data)
+            transaction.set_rollback(True)
+        self.assertLess(res.status_code, 400, f'{method} {name}: {res}')
+        return [normalize(q['sql']) for q in ctx.captured_queries]
+
+    def run_scenarios(self):
+        return {
+            f'{method} {name}': self.capture(name, method, role, arg, data)
+            for name, method, role, arg, data in SCENARIOS
+        }
+
+    def test_every_route_has_a_scenario(self):
+        covered = {scenario[0] for scenario in SCENARIOS}
+        self.assertEqual(set(route_names()) - covered, set())
+
+    def test_query_counts_and_shapes(self):
+        self.grow(SMALL)
+        small = self.run_scenarios()
+        self.grow(LARGE - SMALL)
+        large = self.run_scenarios()
+
+        counts = {key: len(queries) for key, queries in large.items()}
+        for key, queries in small.items():
+            self.assertEqual(
+                len(queries), counts[key],
+                f'{key}: query count grows with the result size.'
+            )
+
+        vendor = connection.vendor
+        baseline = {'counts': {}, 'shapes': {}}
+        if BASELINE_PATH.exists():
+            baseline = json.loads(BASELINE_PATH.read_text())
+
+        if os.environ.get(UPDATE_ENV):
+            baseline['counts'][vendor] = counts
+            baseline['shapes'][vendor] = large
+            BASELINE_PATH.write_text(
+                json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            return
+
+        self.assertIn(
+            vendor, baseline['counts'],
+            f'No {vendor} query baseline: run `manage.py '
+            f'update_query_baseline` against {vendor}.')
+        self.assertEqual(counts, baseline['counts'][vendor])
+        self.assertEqual(large, baseline['shapes'][vendor])
@@ -0,0 +1,134 @@
+"""
+EXPLAIN regression tests for the hot API queries.
+
+Every SELECT an endpoint issues against the book and rental tables is
+re-run through EXPLAIN with sequential scans disabled, so the planner
+falls back to a seq scan only when no index can serve the query.
+"""
+import unittest
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Book, Rental
+
+
+WATCHED_TABLES = ('core_book', 'core_rental')
+
+
+def seed(owner, renter, books=200):
+    """Seed enough rows for the planner to have real choices."""
+    Book.objects.bulk_create([
+        Book(
+            owner=owner,
+            title=f'Book {i}',
+            author='Author',
+            is_available=bool(i % 3),
+        )
+        for i in range(books)
+    ])
+    Rental.objects.bulk_create([
+        Rental(
+            renter=renter,
+            book=book,
+            status=('pending', 'accepted', 'returned')[book.id % 3],
+            end_date=date.today() + timedelta(days=book.id % 30 - 15),
+        )
+        for book in Book.objects.all()
+    ])
+    with connection.cursor() as cursor:
+        for table in WATCHED_TABLES:
+            cursor.execute(f'ANALYZE {table}')
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    'EXPLAIN plans are only checked against PostgreSQL.'
+)
+class QueryPlanTests(TestCase):
+    """Fail when a hot query can only be answered by a sequential scan."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(
+            email='owner@example.com',
+            password='testpass123',
+        )
+        self.renter = get_user_model().objects.create_user(
+            email='renter@example.com',
+            password='testpass123',
+        )
+        seed(self.owner, self.renter)
+        self.client = APIClient()
+
+    def explain(self, sql, params=None):
+        """Return the plan for `sql` with sequential scans disabled."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.execute('SET LOCAL enable_seqscan = on')
+        return plan
+
+    def assertNoSeqScan(self, sql, params=None):
+        plan = self.explain(sql, params)
+        for table in WATCHED_TABLES:
+            self.assertNotIn(
+                f'Seq Scan on {table}', plan,
+                f'Sequential scan on {table}:\n{sql}\n{plan}'
+            )
+
+    def assertEndpointIndexed(self, url, user=None):
+        """Capture the SQL behind `url` and check every watched SELECT."""
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+
+        selects = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT')
+            and any(table in q['sql'] for table in WATCHED_TABLES)
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNoSeqScan(sql)
+
+    def test_book_list(self):
+        self.assertEndpointIndexed(reverse('book:book-list'))
+
+    def test_book_detail(self):
+        book = Book.objects.first()
+        self.assertEndpointIndexed(
+            reverse('book:book-detail', args=[book.id]))
+
+    def test_book_mine(self):
+        self.assertEndpointIndexed(reverse('book:book-mine'), self.owner)
+
+    def test_rental_incoming(self):
+        self.assertEndpointIndexed(
+            reverse('rental:rental-list'), self.owner)
+
+    def test_rental_mine(self):
+        self.assertEndpointIndexed(
+            reverse('rental:rental-mine'), self.renter)
+
+    def test_pending_rentals_for_book(self):
+        book = Book.objects.first()
+        qs = Rental.objects.filter(book=book, status='pending')
+        self.assertNoSeqScan(*qs.query.sql_with_params())
+
+    def test_overdue_scan(self):
+        qs = Rental.objects.filter(
+            status='accepted', end_date__lt=date.today())
+        self.assertNoSeqScan(*qs.query.sql_with_params())
+
+    def test_stale_pending_scan(self):
+        qs = Rental.objects.filter(
+            status='pending', request_date__lt=timezone.now())
+        self.assertNoSeqScan(*qs.query.sql_with_params())
@@ -0,0 +1,72 @@
+"""
+Tests for the orjson JSON renderer.
+"""
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from book.serializers import BookSerializer
+from core.models import Book
+from core.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test output is byte-identical to DRF's JSONRenderer."""
+
+    def assertSameOutput(self, data, media_type=None):
+        expected = JSONRenderer().render(data, media_type)
+        self.assertEqual(FastJSONRenderer().render(data, media_type), expected)
+
+    def test_types(self):
+        self.assertSameOutput(OrderedDict([
+            ('str', 'Bücher ✓'),
+            ('int', 10),
+            ('float', 1.5),
+            ('bool', True),
+            ('none', None),
+            ('list', [1, 'a', {'b': []}]),
+            ('tuple', (1, 2)),
+            ('datetime', timezone.now()),
+            ('naive', datetime.datetime(2024, 5, 1, 12, 30, 0, 1234)),
+            ('date', datetime.date(2024, 5, 1)),
+            ('time', datetime.time(12, 30)),
+            ('timedelta', datetime.timedelta(hours=1)),
+            ('decimal', Decimal('12.50')),
+            ('uuid', uuid.uuid4()),
+            ('lazy', gettext_lazy('This field is required.')),
+            ('set', {1}),
+            ('int_keys', {1: 'a'}),
+        ]))
+
+    def test_line_separators_escaped(self):
+        self.assertSameOutput({'text': 'a\u2028b\u2029c'})
+
+    def test_indent_and_none(self):
+        self.assertSameOutput({'a': [1]}, 'application/json; indent=4')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_big_integers(self):
+        """Test integers orjson rejects fall back to the json module."""
+        self.assertSameOutput({'big': 2 ** 70})
+
+
+class FastJSONSerializerTests(TestCase):
+    """Test serializer output renders identically."""
+
+    def test_books(self):
+        user = get_user_model().objects.create_user(
+            'owner@example.com', 'testpass123', first_name='Zoë')
+        Book.objects.create(
+            owner=user, title='Guerre et paix', author='Tolstoï',
+            description='Long\nlines "quoted"')
+        data = BookSerializer(Book.objects.all(), many=True).data
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -0,0 +1,168 @@
+"""
+Tests for read-replica routing.
+"""
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from book.views import BookViewSet
+from core.db import routers
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Book
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica_0'],
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'replica_pins': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    },
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Test which database each request reads from."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = routers.ReplicaRouter()
+        self.used = []
+        self.middleware = ReplicaRoutingMiddleware(self.get_response)
+        caches['replica_pins'].clear()
+
+    def get_response(self, request):
+        self.used.append(self.router.db_for_read(Book))
+        return self.response
+
+    def call(self, method, action, status=200, **headers):
+        """Run the middleware around a BookViewSet `action` view."""
+        self.response = type('Response', (), {'status_code': status})()
+        request = getattr(self.factory, method)('/', **headers)
+        view = BookViewSet.as_view({method: action})
+        self.middleware.process_view(request, view, (), {})
+        return self.middleware(request)
+
+    def test_safe_read_uses_replica(self):
+        """Test listing books reads from a replica."""
+        self.call('get', 'list')
+
+        self.assertEqual(self.used, ['replica_0'])
+        self.assertFalse(routers.replica_reads())
+
+    def test_other_views_use_primary(self):
+        """Test views not listed in REPLICA_READ_VIEWS use the primary."""
+        self.call('get', 'mine', HTTP_AUTHORIZATION='Bearer a')
+
+        self.assertEqual(self.used, [None])
+
+    def test_write_pins_caller_to_primary(self):
+        """Test a caller reads from the primary right after a write."""
+        self.call('post', 'create', 201, HTTP_AUTHORIZATION='Bearer a')
+        self.call('get', 'list', HTTP_AUTHORIZATION='Bearer a')
+        self.call('get', 'list', HTTP_AUTHORIZATION='Bearer b')
+
+        self.assertEqual(self.used, [None, None, 'replica_0'])
+
+    def test_read_only_post_uses_replica(self):
+        """Test a batch lookup by POST reads a replica and does not pin."""
+        self.call('post', 'batch', HTTP_AUTHORIZATION='Bearer a')
+        self.call('get', 'list', HTTP_AUTHORIZATION='Bearer a')
+
+        self.assertEqual(self.used, ['replica_0', 'replica_0'])
+
+    def test_failed_write_does_not_pin(self):
+        """Test a rejected write leaves the caller on the replica."""
+        self.call('post', 'create', 400, HTTP_AUTHORIZATION='Bearer a')
+        self.call('get', 'list', HTTP_AUTHORIZATION='Bearer a')
+
+        self.assertEqual(self.used[-1], 'replica_0')
+
+    def test_writes_and_migrations_use_primary(self):
+        """Test writes never go to a replica and replicas are not migrated."""
+        token = routers.activate(True)
+        try:
+            self.assertEqual(self.router.db_for_write(Book), 'default')
+        finally:
+            routers.deactivate(token)
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+
+    def test_cache_tables_use_primary(self):
+        """Test the pin cache table is read from the primary."""
+        cache_model = DatabaseCache('replica_pins', {}).cache_model_class
+        token = routers.activate(True)
+        try:
+            self.assertEqual(
+                self.router.db_for_read(cache_model), 'default')
+        finally:
+            routers.deactivate(token)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        """Test everything reads from the primary without replicas."""
+        self.call('get', 'list')
+
+        self.assertEqual(self.used, [None])
+
+
+class ReplicaPinStoreTests(TestCase):
+    """Test pins are shared through the database."""
+
+    def test_pin_seen_by_other_hosts(self):
+        """Test a pin set on one host is read by a cache on another."""
+        request = RequestFactory().post('/', HTTP_AUTHORIZATION='Bearer a')
+        other_host = DatabaseCache('replica_pins', {})
+
+        routers.pin(request)
+
+        self.assertTrue(other_host.get(routers.pin_key(request)))
+
+
+@skipUnless(
+    'replica_0' in settings.DATABASES,
+    'Set DATABASE_REPLICA_URLS to test against a replica.',
+)
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Test routing against a configured replica database."""
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        caches['replica_pins'].clear()
+        self.user = get_user_model().objects.create_user(
+            'owner@example.com', 'testpass123')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_reads_replica_until_write(self):
+        """Test book lists read the replica except right after a write."""
+        replica = connections['replica_0']
+
+        with CaptureQueriesContext(replica) as queries:
+            self.client.get(reverse('book:book-list'))
+        self.assertGreater(len(queries), 0)
+
+        self.client.post(
+            reverse('book:book-list'), {'title': 'New', 'author': 'A'},
+            format='json')
+        with CaptureQueriesContext(replica) as queries:
+            res = self.client.get(reverse('book:book-list'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(len(res.data), 1)
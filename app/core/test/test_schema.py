@@ -0,0 +1,95 @@
+"""
+Tests for the cached OpenAPI schema.
+"""
+import gzip
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaViewTests(SimpleTestCase):
+    """Test serving the schema from the per-process cache."""
+
+    def setUp(self):
+        schema.clear()
+        self.addCleanup(schema.clear)
+        self.client = APIClient()
+
+    def test_generated_once(self):
+        """Test the schema is generated on the first request only."""
+        with mock.patch.object(
+            SchemaGenerator, 'get_schema',
+            autospec=True, side_effect=SchemaGenerator.get_schema,
+        ) as get_schema:
+            first = self.client.get(SCHEMA_URL)
+            second = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(get_schema.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn(b'openapi:', first.content)
+
+    def test_formats_cached_separately(self):
+        """Test YAML and JSON are separate documents with their own ETag."""
+        yaml = self.client.get(SCHEMA_URL)
+        json = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertIn('/api/book/books/', json.json()['paths'])
+        self.assertNotEqual(yaml['ETag'], json['ETag'])
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets an empty 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_gzip(self):
+        """Test clients accepting gzip get the precompressed body."""
+        plain = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', res['Vary'])
+        not_modified = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_versioned_artifact(self):
+        """Test with APP_VERSION the schema is read back from disk."""
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+                APP_VERSION='abc123', SCHEMA_CACHE_DIR=tmp):
+            call_command('build_schema', stdout=StringIO())
+            self.assertEqual(len(os.listdir(tmp)), 2)
+            schema.clear()
+
+            with mock.patch.object(SchemaGenerator, 'get_schema') as get:
+                res = self.client.get(SCHEMA_URL)
+
+            get.assert_not_called()
+            self.assertEqual(res.status_code, 200)
+            self.assertIn(b'openapi:', res.content)
+
+            with override_settings(APP_VERSION='def456'):
+                schema.clear()
+                self.client.get(SCHEMA_URL)
+            self.assertEqual(len(os.listdir(tmp)), 3)
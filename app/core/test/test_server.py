@@ -0,0 +1,85 @@
+"""
+Tests for gunicorn worker sizing and app preloading.
+"""
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from django.conf import settings
+
+from django.test import SimpleTestCase
+
+from core import server
+
+GB = 1 << 30
+
+
+def cgroup(files):
+    """Patch file reads to return the given {path: content}."""
+    return patch.object(server, '_read', side_effect=files.get)
+
+
+class WorkerSizingTests(SimpleTestCase):
+    """Test worker counts follow the container's limits."""
+
+    def test_worker_count_by_class(self):
+        """Test sync workers get twice the processes of threaded ones."""
+        self.assertEqual(server.worker_count('sync', 4, 8 * GB, GB // 4), 9)
+        self.assertEqual(server.worker_count('gthread', 4, 8 * GB, GB // 4), 5)
+
+    def test_worker_count_capped_by_memory(self):
+        """Test the workers fit in memory, with at least one."""
+        self.assertEqual(server.worker_count('sync', 4, GB, GB // 4), 4)
+        self.assertEqual(server.worker_count('sync', 4, GB // 8, GB // 4), 1)
+        self.assertEqual(server.worker_count('sync', 2, None, GB // 4), 5)
+
+    def test_cpu_limit_from_cgroup_quota(self):
+        """Test a fractional CPU quota rounds up."""
+        with patch('os.sched_getaffinity', return_value=set(range(8))):
+            with cgroup({'/sys/fs/cgroup/cpu.max': '150000 100000'}):
+                self.assertEqual(server.cpu_limit(), 2)
+            with cgroup({'/sys/fs/cgroup/cpu.max': 'max 100000'}):
+                self.assertEqual(server.cpu_limit(), 8)
+            with cgroup({
+                '/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '300000',
+                '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000',
+            }):
+                self.assertEqual(server.cpu_limit(), 3)
+
+    def test_memory_limit(self):
+        """Test the cgroup limit wins over the host's memory."""
+        meminfo = 'MemTotal:       16384000 kB\nMemFree: 1 kB'
+        with cgroup({
+            '/sys/fs/cgroup/memory.max': str(GB), '/proc/meminfo': meminfo,
+        }):
+            self.assertEqual(server.memory_limit(), GB)
+        with cgroup({
+            '/sys/fs/cgroup/memory.max': 'max', '/proc/meminfo': meminfo,
+        }):
+            self.assertEqual(server.memory_limit(), 16384000 * 1024)
+        with cgroup({}):
+            self.assertIsNone(server.memory_limit())
+
+
+class PreloadTests(SimpleTestCase):
+    """Test loading the app module imports the views for preload_app."""
+
+    def loaded(self, module):
+        code = (
+            f'import sys, {module}; '
+            'print(all(m in sys.modules for m in '
+            '("book.views", "rental.views", "core.sync")))'
+        )
+        out = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE='app.settings'),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return out.strip() == 'True'
+
+    def test_wsgi_loads_urlconf(self):
+        self.assertTrue(self.loaded('app.wsgi'))
+
+    def test_asgi_loads_urlconf(self):
+        self.assertTrue(self.loaded('app.asgi'))
@@ -0,0 +1,79 @@
+"""
+Tests for the S3 media storage backend.
+"""
+from unittest import mock
+
+from botocore.stub import Stubber
+from django.test import SimpleTestCase
+
+from core import instrumentation, tracing
+from core.storage_backends import SupabasePublicMediaStorage
+
+
+class SupabasePublicMediaStorageTests(SimpleTestCase):
+    """Test storage calls are timed and traced around the S3 requests."""
+
+    def setUp(self):
+        self.storage = SupabasePublicMediaStorage(
+            bucket_name='media',
+            endpoint_url='https://example.supabase.co/storage/v1/s3',
+            access_key='key',
+            secret_key='secret',
+            region_name='us-east-1',
+        )
+        self.stub = Stubber(self.storage.connection.meta.client)
+        self.stub.activate()
+        self.addCleanup(self.stub.deactivate)
+        self.key = {'Bucket': 'media', 'Key': 'uploads/book/x.jpg'}
+
+    def run_traced(self, call):
+        """Run `call` in a sampled request, returning the exported spans."""
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.activate(metrics)
+        root = tracing.Span(
+            tracing.Trace('0' * 31 + '1'), None, 'request',
+            tracing.KIND_SERVER, {})
+        try:
+            with mock.patch.object(tracing.exporter, 'export') as export:
+                with tracing.activate(root):
+                    result = call()
+        finally:
+            instrumentation.deactivate(token)
+        self.assertIn('storage', metrics.durations)
+        return result, [args[0] for args, _ in export.call_args_list]
+
+    def test_exists_and_size(self):
+        """Test HEAD requests are recorded as storage spans."""
+        self.stub.add_response(
+            'head_object', {'ContentLength': 10}, self.key)
+        self.stub.add_response(
+            'head_object', {'ContentLength': 10}, self.key)
+
+        exists, spans = self.run_traced(
+            lambda: self.storage.exists('uploads/book/x.jpg'))
+        size, _ = self.run_traced(
+            lambda: self.storage.size('uploads/book/x.jpg'))
+
+        self.assertTrue(exists)
+        self.assertEqual(size, 10)
+        self.assertEqual(spans[0].name, 'storage.exists')
+        self.assertEqual(
+            spans[0].attributes, {'name': 'uploads/book/x.jpg'})
+        self.stub.assert_no_pending_responses()
+
+    def test_delete(self):
+        """Test deletes reach S3."""
+        self.stub.add_response('delete_object', {}, self.key)
+
+        _, spans = self.run_traced(
+            lambda: self.storage.delete('uploads/book/x.jpg'))
+
+        self.assertEqual(spans[0].name, 'storage.delete')
+        self.stub.assert_no_pending_responses()
+
+    def test_untraced_calls(self):
+        """Test storage works outside a request too."""
+        self.stub.add_response(
+            'head_object', {'ContentLength': 3}, self.key)
+
+        self.assertEqual(self.storage.size('uploads/book/x.jpg'), 3)
@@ -0,0 +1,283 @@
+"""
+Tests for the incremental sync endpoint.
+"""
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Book, Change, Rental
+from core.sync import make_token
+
+
+SYNC_URL = reverse('sync')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Helper function to create a user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncApiTests(TransactionTestCase):
+    """
+    Test syncing books and rentals from a token. Changes are committed as
+    they would be in production, since on Postgres those of a transaction
+    still in flight are sent again.
+    """
+
+    def setUp(self):
+        self.owner = create_user('owner@example.com')
+        self.renter = create_user('renter@example.com')
+        self.book = Book.objects.create(
+            owner=self.owner, title='Book', author='Author')
+        self.rental = Rental.objects.create(
+            renter=self.renter, book=self.book)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def sync(self, token=None):
+        res = self.client.get(SYNC_URL, {'since': token} if token else {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_auth_required(self):
+        """Test sync needs an authenticated user."""
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_snapshot_without_token(self):
+        """Test the first sync returns everything the user can see."""
+        owner = self.sync()
+        self.client.force_authenticate(self.renter)
+        renter = self.sync()
+
+        self.assertTrue(owner['reset'])
+        self.assertEqual([b['id'] for b in owner['books']], [self.book.id])
+        self.assertEqual(
+            [r['id'] for r in owner['rentals']], [self.rental.id])
+        self.assertEqual(renter['books'], [])
+        self.assertEqual(
+            [r['id'] for r in renter['rentals']], [self.rental.id])
+
+    def test_no_changes_is_one_query(self):
+        """Test a sync with nothing new only probes the change log."""
+        token = self.sync()['token']
+
+        with self.assertNumQueries(1):
+            data = self.sync(token)
+
+        self.assertFalse(data['reset'])
+        self.assertEqual(data['books'], [])
+        self.assertEqual(data['rentals'], [])
+        self.assertEqual(data['deleted'], {'books': [], 'rentals': []})
+        self.assertEqual(data['token'].split('.')[0], token.split('.')[0])
+
+    def test_changes_and_tombstones(self):
+        """Test changed rows are returned and deleted ones tombstoned."""
+        token = self.sync()['token']
+        self.client.patch(
+            reverse('book:book-detail', args=[self.book.id]),
+            {'title': 'New title'})
+        new = Book.objects.create(owner=self.owner, title='B', author='A')
+        rental_id = self.rental.id
+        self.rental.delete()
+
+        data = self.sync(token)
+
+        self.assertEqual(
+            {b['id']: b['title'] for b in data['books']},
+            {self.book.id: 'New title', new.id: 'B'})
+        self.assertEqual(
+            data['deleted'], {'books': [], 'rentals': [rental_id]})
+        self.assertEqual(self.sync(data['token'])['books'], [])
+
+    def test_cascade_leaves_tombstones(self):
+        """Test rows deleted by a cascade reach the other party."""
+        self.client.force_authenticate(self.renter)
+        token = self.sync()['token']
+        rental_id = self.rental.id
+
+        self.owner.delete()
+
+        data = self.sync(token)
+        self.assertEqual(
+            data['deleted'], {'books': [], 'rentals': [rental_id]})
+
+    def test_transition_reaches_renter(self):
+        """Test the renter sees their request being accepted."""
+        self.client.force_authenticate(self.renter)
+        token = self.sync()['token']
+        self.client.force_authenticate(self.owner)
+        self.client.post(
+            reverse('rental:rental-accept', args=[self.rental.id]))
+        self.client.force_authenticate(self.renter)
+
+        data = self.sync(token)
+
+        self.assertEqual(data['rentals'][0]['status'], 'accepted')
+        # The book is not the renter's, so it is not synced.
+        self.assertEqual(data['books'], [])
+
+    def test_scheduler_transitions_are_logged(self):
+        """Test bulk status updates of the scheduler are synced."""
+        token = self.sync()['token']
+        Rental.objects.filter(id=self.rental.id).update(
+            request_date=timezone.now() - timedelta(days=30))
+
+        call_command('rental_scheduler', stdout=StringIO())
+
+        data = self.sync(token)
+        self.assertEqual(data['rentals'][0]['status'], 'expired')
+
+    @override_settings(SYNC_MAX_CHANGES=2)
+    def test_pages(self):
+        """Test long change lists are returned in pages."""
+        token = self.sync()['token']
+        for i in range(3):
+            Book.objects.create(owner=self.owner, title=str(i), author='A')
+
+        first = self.sync(token)
+        second = self.sync(first['token'])
+
+        self.assertTrue(first['more'])
+        self.assertEqual([b['title'] for b in first['books']], ['0', '1'])
+        self.assertFalse(second['more'])
+        self.assertEqual([b['title'] for b in second['books']], ['2'])
+
+    @skipIf(connection.vendor == 'postgresql', 'Postgres uses snapshots.')
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_recent_changes_are_sent_again(self):
+        """Test tokens do not move past changes that may not be final."""
+        token = make_token(0)
+
+        data = self.sync(token)
+
+        self.assertEqual([b['id'] for b in data['books']], [self.book.id])
+        self.assertEqual(data['token'].split('.')[0], '0')
+
+    @override_settings(SYNC_RETENTION=timedelta(days=1))
+    def test_expired_token_resets(self):
+        """Test tokens older than the retention get a snapshot."""
+        token = make_token(0, int(time.time()) - 2 * 24 * 3600)
+
+        data = self.sync(token)
+
+        self.assertTrue(data['reset'])
+        self.assertEqual([b['id'] for b in data['books']], [self.book.id])
+
+    def test_invalid_token(self):
+        """Test a malformed token is rejected."""
+        res = self.client.get(SYNC_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SYNC_RETENTION=timedelta(days=1))
+    def test_purge_changes(self):
+        """Test the purge command deletes changes past the retention."""
+        Change.objects.filter(object_id=self.book.id, kind='book').update(
+            created_at=timezone.now() - timedelta(days=2))
+
+        call_command('purge_changes', batch_size=1, stdout=StringIO())
+
+        self.assertFalse(Change.objects.filter(kind='book').exists())
+        self.assertEqual(Change.objects.filter(kind='rental').count(), 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs Postgres.')
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SnapshotTokenTests(TransactionTestCase):
+    """Test tokens on Postgres wait for transactions still in flight."""
+
+    def setUp(self):
+        self.owner = create_user('owner@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def sync(self, token=None):
+        res = self.client.get(SYNC_URL, {'since': token} if token else {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def start_long_transaction(self):
+        """Log a book in a transaction left open until the event is set."""
+        logged, release = threading.Event(), threading.Event()
+
+        def long_transaction():
+            try:
+                with transaction.atomic():
+                    Book.objects.create(
+                        owner=self.owner, title='Long', author='A')
+                    logged.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=long_transaction)
+        thread.start()
+        logged.wait(10)
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        return release, thread
+
+    def sync_all(self, token):
+        """Sync until `more` is false; return the titles and last token."""
+        titles = []
+        for _ in range(10):
+            data = self.sync(token)
+            titles += [b['title'] for b in data['books']]
+            token = data['token']
+            if not data['more']:
+                return titles, token
+        self.fail('Sync did not finish.')
+
+    def test_long_transaction_is_not_skipped(self):
+        """Test a change committed after a higher one is still synced."""
+        token = self.sync()['token']
+        release, thread = self.start_long_transaction()
+        Book.objects.create(owner=self.owner, title='Short', author='A')
+
+        first = self.sync(token)
+        release.set()
+        thread.join()
+        second = self.sync(first['token'])
+
+        self.assertEqual([b['title'] for b in first['books']], ['Short'])
+        # Short is sent again, as its transaction came after Long's.
+        self.assertIn('Long', [b['title'] for b in second['books']])
+
+    @override_settings(SYNC_MAX_CHANGES=1)
+    def test_pages_sent_again_move_on(self):
+        """Test more than a page of changes sent again does not stall."""
+        release, thread = self.start_long_transaction()
+        for title in 'ABC':
+            Book.objects.create(owner=self.owner, title=title, author='A')
+        token = self.sync()['token']
+
+        titles, token = self.sync_all(token)
+
+        self.assertEqual(titles, ['A', 'B', 'C'])
+        release.set()
+        thread.join()
+        titles, token = self.sync_all(token)
+        self.assertIn('Long', titles)
+        titles, token = self.sync_all(token)
+        self.assertEqual(titles, [])
+
+    def test_token_without_snapshot_resets(self):
+        """Test a token issued without a snapshot xmin gets a snapshot."""
+        data = self.sync(make_token(0))
+
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['token'].split('.')), 3)
@@ -0,0 +1,86 @@
+"""
+Tests for span tracing and the file exporter.
+"""
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import tracing
+from core.models import Book
+
+
+BOOKS_URL = reverse('book:book-list')
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+
+class TracingTests(TestCase):
+    """Test traces exported for sampled requests."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'spans.jsonl')
+        self.settings = override_settings(
+            TRACING_EXPORT_PATH=self.path,
+            TRACING_SAMPLE_RATE=0,
+        )
+        self.settings.enable()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        Book.objects.create(owner=user, title='T', author='A')
+
+    def tearDown(self):
+        self.settings.disable()
+        self.dir.cleanup()
+
+    def exported_spans(self):
+        tracing.exporter.flush()
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as fh:
+            return [
+                span
+                for line in fh
+                for resource in json.loads(line)['resourceSpans']
+                for scope in resource['scopeSpans']
+                for span in scope['spans']
+            ]
+
+    def test_sampled_request_exports_span_tree(self):
+        """Test view, permission, serializer and SQL spans are linked."""
+        with override_settings(TRACING_SAMPLE_RATE=1):
+            res = self.client.get(BOOKS_URL)
+
+        spans = {span['name']: span for span in self.exported_spans()}
+        root = spans['BookViewSet.list']
+        self.assertNotIn('parentSpanId', root)
+        self.assertEqual(spans['permissions']['parentSpanId'], root['spanId'])
+        self.assertIn('serialize BookSerializer', spans)
+        self.assertIn('db.query', spans)
+        self.assertEqual(
+            len({span['traceId'] for span in spans.values()}), 1)
+        self.assertIn(root['traceId'], res['traceparent'])
+
+    def test_incoming_traceparent_continued(self):
+        """Test a sampled traceparent header is continued."""
+        self.client.get(
+            BOOKS_URL, HTTP_TRACEPARENT=f'00-{TRACE_ID}-00f067aa0ba902b7-01')
+
+        spans = self.exported_spans()
+        self.assertTrue(spans)
+        self.assertTrue(all(s['traceId'] == TRACE_ID for s in spans))
+        root = next(s for s in spans if s['name'] == 'BookViewSet.list')
+        self.assertEqual(root['parentSpanId'], '00f067aa0ba902b7')
+
+    def test_unsampled_request_not_traced(self):
+        """Test nothing is exported for unsampled requests."""
+        self.client.get(
+            BOOKS_URL, HTTP_TRACEPARENT=f'00-{TRACE_ID}-00f067aa0ba902b7-00')
+        self.client.get(BOOKS_URL)
+
+        self.assertEqual(self.exported_spans(), [])
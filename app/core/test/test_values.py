@@ -0,0 +1,170 @@
+"""
+Tests for serializing from values_list() rows.
+"""
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from hypothesis import given, settings, strategies as st
+from hypothesis.extra.django import TestCase
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from book.serializers import BookSerializer
+from core.models import Book, Rental
+from core.values import ValuesSerializer
+from rental.serializers import RentalSerializer
+
+text = st.text(
+    st.characters(
+        blacklist_categories=('Cs',), blacklist_characters='\x00'),
+    max_size=40,
+)
+datetimes = st.datetimes(
+    min_value=datetime.datetime(2000, 1, 1),
+    max_value=datetime.datetime(2100, 1, 1),
+    timezones=st.just(datetime.timezone.utc),
+)
+dates = st.none() | st.dates(
+    min_value=datetime.date(2000, 1, 1),
+    max_value=datetime.date(2100, 1, 1),
+)
+users = st.fixed_dictionaries({'first_name': text, 'last_name': text})
+books = st.fixed_dictionaries({
+    'title': text,
+    'author': text,
+    'description': text,
+    'condition': st.sampled_from([c for c, _ in Book.CONDITION_CHOICES]),
+    'is_available': st.booleans(),
+    'image': st.sampled_from(['', 'uploads/book/a b.jpg', 'ü/é.png']),
+    'created_at': datetimes,
+})
+rentals = st.fixed_dictionaries({
+    'status': st.sampled_from([s for s, _ in Rental.STATUS_CHOICES]),
+    'request_date': datetimes,
+    'start_date': dates,
+    'end_date': dates,
+    'message': text,
+})
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class ValuesSerializerEquivalenceTests(TestCase):
+    """Test ValuesSerializer renders byte-identical to the serializers."""
+
+    def setUp(self):
+        self.context = {'request': RequestFactory().get('/')}
+
+    def create(self, owners, book_rows, rental_rows):
+        User = get_user_model()
+        owners = [
+            User.objects.create(email=f'user{i}@example.com', **fields)
+            for i, fields in enumerate(owners)
+        ]
+        created = []
+        for i, fields in enumerate(book_rows):
+            fields = dict(fields)
+            created_at = fields.pop('created_at')
+            book = Book.objects.create(owner=owners[i % len(owners)], **fields)
+            Book.objects.filter(pk=book.pk).update(created_at=created_at)
+            created.append(book)
+        for i, fields in enumerate(rental_rows):
+            fields = dict(fields)
+            request_date = fields.pop('request_date')
+            renter = User.objects.create(email=f'renter{i}@example.com')
+            rental = Rental.objects.create(
+                renter=renter, book=created[i % len(created)], **fields)
+            Rental.objects.filter(pk=rental.pk).update(
+                request_date=request_date)
+
+    def assertEquivalent(self, serializer_class, queryset):
+        expected = serializer_class(
+            queryset, many=True, context=self.context).data
+        values = ValuesSerializer(
+            serializer_class, queryset, context=self.context).data
+        self.assertEqual(render(values), render(expected))
+
+    @settings(max_examples=30, deadline=None)
+    @given(
+        st.lists(users, min_size=1, max_size=3),
+        st.lists(books, min_size=1, max_size=5),
+        st.lists(rentals, max_size=5),
+    )
+    def test_equivalent(self, owner_rows, book_rows, rental_rows):
+        self.create(owner_rows, book_rows, rental_rows)
+
+        self.assertEquivalent(
+            BookSerializer,
+            Book.objects.select_related('owner').order_by('-id'))
+        self.assertEquivalent(
+            RentalSerializer, Rental.objects.order_by('-request_date'))
+
+    @override_settings(TIME_ZONE='America/New_York')
+    @settings(max_examples=10, deadline=None)
+    @given(st.lists(books, min_size=1, max_size=3))
+    def test_equivalent_in_other_timezone(self, book_rows):
+        self.create([{}], book_rows, [])
+
+        self.assertEquivalent(BookSerializer, Book.objects.order_by('id'))
+
+
+class ValuesSerializerPlanTests(SimpleTestCase):
+    """Test which serializers can be compiled."""
+
+    def test_unsupported_field(self):
+        class Computed(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Book
+                fields = ['id', 'label']
+
+        with self.assertRaises(ImproperlyConfigured):
+            ValuesSerializer.plan(Computed)
+
+
+class ValuesSerializerViewTests(TestCase):
+    """Test the VALUES_SERIALIZER_VIEWS actions."""
+
+    def setUp(self):
+        User = get_user_model()
+        owner = User.objects.create_user('owner@example.com', 'testpass123')
+        self.renter = User.objects.create_user(
+            'renter@example.com', 'testpass123')
+        book = Book.objects.create(owner=owner, title='Book', author='A')
+        Rental.objects.create(renter=self.renter, book=book)
+        self.client = APIClient()
+
+    def get_both(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            fast = self.client.get(url)
+            # Only the serialized columns are selected, not the password.
+            self.assertNotIn('password', queries[-1]['sql'])
+        with override_settings(VALUES_SERIALIZER_VIEWS=set()):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        return fast, slow
+
+    def test_book_list(self):
+        fast, slow = self.get_both(reverse('book:book-list'))
+
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast.json()[0]['title'], 'Book')
+
+    def test_rental_mine(self):
+        token = RefreshToken.for_user(self.renter).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        fast, slow = self.get_both(reverse('rental:rental-mine'))
+
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast.json()[0]['status'], 'pending')
@@ -0,0 +1,252 @@
+"""
+Lightweight span tracing with a batched OTLP/JSON file exporter.
+
+A request is traced when its W3C `traceparent` header is sampled, or when
+no header is sent and it is picked by TRACING_SAMPLE_RATE. Finished spans
+are queued and written by a background thread as OTLP/JSON lines to
+TRACING_EXPORT_PATH, the format of the OpenTelemetry collector file
+exporter.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+HEADER = 'traceparent'
+TRACEPARENT_RE = re.compile(
+    r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current = contextvars.ContextVar('trace_span', default=None)
+
+
+class Trace:
+    """Shared state of the spans of one sampled request."""
+    __slots__ = ('trace_id', 'spans')
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = 0
+
+
+class Span:
+    __slots__ = (
+        'trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+        'start_ns', 'end_ns', 'error',
+    )
+
+    def __init__(self, trace, parent_id, name, kind, attributes):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = False
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [
+                {'key': key, 'value': {'stringValue': str(value)}}
+                for key, value in self.attributes.items()
+            ],
+            'status': {'code': 2 if self.error else 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class FileExporter:
+    """Write finished spans to a file in batches from a daemon thread."""
+
+    def __init__(self):
+        self.queue = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            # (Re)start after import or fork; threads do not survive fork.
+            self.queue = queue.Queue(settings.TRACING_QUEUE_SIZE)
+            self.pid = os.getpid()
+            threading.Thread(
+                target=self._run, name='span-exporter', daemon=True
+            ).start()
+
+    def export(self, span):
+        if self.pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first=None):
+        batch = [] if first is None else [first]
+        while len(batch) < settings.TRACING_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                self.write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        return len(batch)
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(
+                    timeout=settings.TRACING_EXPORT_INTERVAL)
+            except queue.Empty:
+                continue
+            try:
+                self._drain(first)
+            except OSError:
+                # Keep exporting later batches if the sink is unwritable.
+                self.dropped += 1
+
+    def write(self, spans):
+        record = {'resourceSpans': [{
+            'resource': {'attributes': [{
+                'key': 'service.name',
+                'value': {'stringValue': settings.TRACING_SERVICE_NAME},
+            }]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]}
+        path = settings.TRACING_EXPORT_PATH
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self.lock, open(path, 'a') as fh:
+            fh.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        """Write every queued span, including batches being written."""
+        if self.queue is not None and self.pid == os.getpid():
+            while self._drain():
+                pass
+            self.queue.join()
+
+
+exporter = FileExporter()
+atexit.register(exporter.flush)
+
+
+def parse_traceparent(value):
+    """Return (trace id, parent span id, sampled) or None."""
+    match = TRACEPARENT_RE.match(value or '')
+    if not match or match.group(1) == '0' * 32:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def start_trace(headers):
+    """Return the root span for an incoming request, or None if unsampled."""
+    parent = parse_traceparent(headers.get(HEADER))
+    if parent:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        rate = settings.TRACING_SAMPLE_RATE
+        sampled = rate > 0 and random.random() < rate
+    if not sampled:
+        return None
+    return Span(Trace(trace_id), parent_id, 'request', KIND_SERVER, {})
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def activate(span):
+    """Make `span` current for the block, then end and export it."""
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.error = True
+        raise
+    finally:
+        _current.reset(token)
+        span.end_ns = time.time_ns()
+        exporter.export(span)
+
+
+@contextmanager
+def span(name, /, kind=KIND_INTERNAL, **attributes):
+    """Record the block as a child of the current span, if tracing."""
+    parent = _current.get()
+    if parent is None or parent.trace.spans >= settings.TRACING_MAX_SPANS:
+        yield None
+        return
+    parent.trace.spans += 1
+    with activate(Span(parent.trace, parent.span_id, name, kind,
+                       attributes)) as child:
+        yield child
+
+
+def record_query(execute, sql, params, many, context):
+    """`connection.execute_wrapper` hook adding a span per SQL statement."""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    with span('db.query', KIND_CLIENT, **{
+        'db.system': context['connection'].vendor,
+        'db.statement': sql,
+    }):
+        return execute(sql, params, many, context)
+
+
+def traced(name):
+    """Decorate a view method so each call is recorded as a span."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with span(name, view=type(self).__name__):
+                return method(self, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class TracedViewMixin:
+    """Trace the permission checks of a view."""
+
+    @traced('permissions')
+    def check_permissions(self, request):
+        super().check_permissions(request)
+
+    @traced('object_permissions')
+    def check_object_permissions(self, request, obj):
+        super().check_object_permissions(request, obj)
@@ -0,0 +1,107 @@
+"""
+Sampled, anonymized traffic capture and replay.
+
+TrafficCaptureMiddleware writes one NDJSON record per sampled request to
+rotating per-process files in TRAFFIC_CAPTURE_DIR. Records keep the
+resolved route, query parameters and the *shape* of the body (field names
+and value types), never body values, and replace the caller with a
+hashed user bucket. `manage.py replay_traffic` replays them against a
+seeded instance (see core.replay, kept apart so that workers do not
+import the load generator).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+
+REGEX_GROUP_RE = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def user_bucket(request):
+    """Map the caller's credentials to one of TRAFFIC_CAPTURE_BUCKETS."""
+    auth = request.headers.get('Authorization')
+    if not auth:
+        return None
+    digest = hashlib.sha256(auth.encode()).digest()
+    return int.from_bytes(digest[:4], 'big') % settings.TRAFFIC_CAPTURE_BUCKETS
+
+
+def route_template(resolver_match):
+    """Return the matched route with arguments as `<name>` placeholders."""
+    route = REGEX_GROUP_RE.sub(r'<\1>', resolver_match.route)
+    return route.replace('^', '').replace('$', '')
+
+
+def value_type(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return 'int'
+    if isinstance(value, (list, tuple)):
+        return 'list'
+    if isinstance(value, dict):
+        return 'object'
+    return 'str'
+
+
+def body_shape(request):
+    """Return {field: type} for the request body, without its values."""
+    content_type = request.content_type or ''
+    if content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return {'_': value_type(data)}
+        return {key: value_type(value) for key, value in data.items()}
+    if request.method in ('POST', 'PUT', 'PATCH') and content_type in (
+        'multipart/form-data', 'application/x-www-form-urlencoded'
+    ):
+        shape = {key: value_type(request.POST[key]) for key in request.POST}
+        shape.update({key: 'file' for key in request.FILES})
+        return shape
+    return None
+
+
+def _logger():
+    """Per-process logger writing to its own rotating NDJSON file."""
+    pid = os.getpid()
+    with _handlers_lock:
+        logger = _handlers.get(pid)
+        if logger is None:
+            os.makedirs(settings.TRAFFIC_CAPTURE_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(
+                    settings.TRAFFIC_CAPTURE_DIR, f'traffic-{pid}.ndjson'),
+                maxBytes=settings.TRAFFIC_CAPTURE_MAX_BYTES,
+                backupCount=settings.TRAFFIC_CAPTURE_BACKUPS,
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger(f'core.traffic.{pid}')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            _handlers[pid] = logger
+    return logger
+
+
+def write_record(record):
+    _logger().info(json.dumps(record, separators=(',', ':')))
+
+
+def read_records(paths):
+    """Load capture records from NDJSON files, oldest first."""
+    records = []
+    for path in paths:
+        with open(path) as fh:
+            records.extend(json.loads(line) for line in fh if line.strip())
+    return sorted(records, key=lambda record: record['ts'])
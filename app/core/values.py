@@ -0,0 +1,189 @@
+"""
+Read-only serialization straight from values_list() rows.
+
+A ModelSerializer spends most of a large list in its per-field machinery:
+attribute lookups, model instances, `to_representation` calls for values
+that are already strings and numbers. ValuesSerializer compiles a
+ModelSerializer class once into the columns it reads and the few
+conversions it applies, then builds the same dicts from
+queryset.values_list() rows, with nested serializers of forward foreign
+keys read through the join.
+
+ValuesSerializerViewMixin uses it for the list actions named in
+VALUES_SERIALIZER_VIEWS, except on `?fields=`/`?expand=` requests.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework import ISO_8601, fields, relations, serializers
+from rest_framework.settings import api_settings
+
+from core.fieldsets import requested
+from core.instrumentation import timed
+
+# DRF fields whose to_representation returns database values unchanged.
+PLAIN_FIELDS = (
+    fields.BooleanField,
+    fields.CharField,
+    fields.ChoiceField,
+    fields.IntegerField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _image_url(storage):
+    def convert(name, state):
+        # FileField.to_representation without the FieldFile.
+        if not name:
+            return None
+        url = storage.url(name)
+        request = state['request']
+        return request.build_absolute_uri(url) if request else url
+    return convert
+
+
+def _datetime(field):
+    """
+    DateTimeField.to_representation with the current timezone looked up
+    once per list rather than once per value.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if (
+        output_format is None or output_format.lower() != ISO_8601
+        or hasattr(field, 'timezone')
+    ):
+        return _representation(field)
+
+    def convert(value, state):
+        if value.tzinfo is None or state['timezone'] is None:
+            return field.to_representation(value)
+        value = value.astimezone(state['timezone']).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _representation(field):
+    def convert(value, state):
+        return field.to_representation(value)
+    return convert
+
+
+def compile_plan(serializer, columns, prefix=''):
+    """
+    Return the plan of `serializer`, adding the values_list() lookups it
+    reads to `columns`.
+
+    A plan is a list of (name, column index, converter, nested plan);
+    converters take the value and the per-list state of
+    ValuesSerializer.data.
+    The column of a nested serializer is its foreign key, for the None
+    check DRF does before representing it.
+    """
+    model = serializer.Meta.model
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f'{type(serializer).__name__}.{name} is not a model field.')
+        columns.append(prefix + model_field.name)
+        index = len(columns) - 1
+        if isinstance(field, serializers.ModelSerializer):
+            if not model_field.many_to_one:
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{name} is not a '
+                    'forward foreign key.')
+            nested = compile_plan(
+                field, columns, prefix + model_field.name + '__')
+            plan.append((name, index, None, nested))
+        elif isinstance(field, fields.ImageField):
+            plan.append((name, index, _image_url(model_field.storage), None))
+        elif isinstance(field, fields.DateTimeField):
+            plan.append((name, index, _datetime(field), None))
+        elif isinstance(field, fields.DateField):
+            plan.append((name, index, _representation(field), None))
+        elif isinstance(field, PLAIN_FIELDS):
+            plan.append((name, index, None, None))
+        else:
+            raise ImproperlyConfigured(
+                f'{type(serializer).__name__}.{name}: '
+                f'{type(field).__name__} is not supported.')
+    return plan
+
+
+def build(plan, row, state):
+    data = {}
+    for name, index, convert, nested in plan:
+        value = row[index]
+        if value is None:
+            data[name] = None
+        elif nested is not None:
+            data[name] = build(nested, row, state)
+        elif convert is None:
+            data[name] = value
+        else:
+            data[name] = convert(value, state)
+    return data
+
+
+class ValuesSerializer:
+    """
+    Stand-in for `serializer_class(queryset, many=True)` on reads, with
+    the same `data`.
+    """
+    _plans = {}
+
+    def __init__(self, serializer_class, queryset, context=None):
+        self.serializer_class = serializer_class
+        self.queryset = queryset
+        self.context = context or {}
+
+    @classmethod
+    def plan(cls, serializer_class):
+        """Return the cached (columns, plan) of `serializer_class`."""
+        compiled = cls._plans.get(serializer_class)
+        if compiled is None:
+            columns = []
+            plan = compile_plan(serializer_class(), columns)
+            compiled = cls._plans[serializer_class] = (columns, plan)
+        return compiled
+
+    @property
+    def data(self):
+        columns, plan = self.plan(self.serializer_class)
+        rows = list(self.queryset.values_list(*columns))
+        state = {
+            'request': self.context.get('request'),
+            'timezone': (
+                timezone.get_current_timezone() if settings.USE_TZ
+                else None),
+        }
+        name = self.serializer_class.__name__
+        with timed('serializer', span=f'serialize {name}'):
+            return [build(plan, row, state) for row in rows]
+
+
+class ValuesSerializerViewMixin:
+    """
+    View mixin serializing querysets of the VALUES_SERIALIZER_VIEWS actions
+    with ValuesSerializer.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if (
+            kwargs.get('many') and args and isinstance(args[0], QuerySet)
+            and f'{type(self).__name__}.{self.action}'
+            in settings.VALUES_SERIALIZER_VIEWS
+            and requested(self.request) == (None, None)
+        ):
+            return ValuesSerializer(
+                self.get_serializer_class(), args[0],
+                context=self.get_serializer_context(),
+            )
+        return super().get_serializer(*args, **kwargs)
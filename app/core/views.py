@@ -1,3 +1,23 @@
-from django.shortcuts import render # noqa
+"""
+Views for the core app.
+"""
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
 
-# Create your views here.
+from core import metrics as prometheus
+
+
+def metrics(request):
+    """
+    Expose Prometheus metrics aggregated across worker processes to
+    scrapers sending METRICS_TOKEN. Without a token configured, no one
+    can scrape them.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    content_type, body = prometheus.exposition()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,101 @@
+"""
+Gunicorn configuration, loaded automatically from the working directory.
+
+Tuned through the environment:
+
+- WEB_WORKER_CLASS: sync, gthread (default), gevent or uvicorn. All but
+  sync keep serving while a request waits on S3 or the database; gevent
+  needs the gevent and psycogreen packages installed. uvicorn serves
+  app.asgi, with the async views of core/aio.py.
+- WEB_CONCURRENCY: worker processes, autosized from CPU and memory.
+- WEB_THREADS: threads per gthread worker (4).
+- WEB_WORKER_MEMORY_MB: memory budgeted per worker when autosizing (256).
+- WEB_MAX_REQUESTS: recycle workers after this many requests (1000,
+  with up to 10% jitter so they do not all restart together).
+- WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT, WEB_KEEPALIVE: seconds.
+"""
+import os
+import time
+
+from core.server import (
+    WORKER_CLASSES,
+    cpu_limit,
+    memory_limit,
+    worker_count,
+)
+
+bind = f'0.0.0.0:{os.environ.get("PORT", "8000")}'
+
+WEB_WORKER_CLASS = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+if WEB_WORKER_CLASS not in WORKER_CLASSES:
+    raise RuntimeError(
+        f'WEB_WORKER_CLASS must be one of {sorted(WORKER_CLASSES)}')
+if WEB_WORKER_CLASS == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'app.asgi:application'
+else:
+    worker_class = WEB_WORKER_CLASS
+    wsgi_app = 'app.wsgi:application'
+# gunicorn turns sync workers with threads into gthread workers.
+threads = int(os.environ.get('WEB_THREADS', 4)) if (
+    WEB_WORKER_CLASS == 'gthread') else 1
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 100))
+workers = int(os.environ.get('WEB_CONCURRENCY') or worker_count(
+    WEB_WORKER_CLASS,
+    cpu_limit(),
+    memory_limit(),
+    int(os.environ.get('WEB_WORKER_MEMORY_MB', 256)) << 20,
+))
+
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+# Heartbeat files on tmpfs, so a slow disk cannot get workers killed.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Import Django and the URLconf (app/wsgi.py and app/asgi.py load it up
+# front) once in the master; workers are forked with everything loaded
+# instead of importing it each.
+preload_app = True
+
+# Set by scripts/run.sh when the container starts.
+BOOT_STARTED_AT = float(os.environ.get('BOOT_STARTED_AT') or time.time())
+
+
+def when_ready(server):
+    """Log the worker setup and how long the container took to start."""
+    server.log.info(
+        'Ready %.2fs after boot: %s %s workers, %s threads',
+        time.time() - BOOT_STARTED_AT, workers, WEB_WORKER_CLASS, threads)
+
+
+def post_fork(server, worker):
+    """Drop any database connection inherited from the master."""
+    if WEB_WORKER_CLASS == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+    from django.db import connections
+
+    connections.close_all()
+
+
+def pre_request(worker, req):
+    """Log the time to the first request of each worker."""
+    if not getattr(worker, 'served', False):
+        worker.served = True
+        worker.log.info(
+            'Worker %s: first request %.2fs after boot',
+            worker.pid, time.time() - BOOT_STARTED_AT)
+
+
+def child_exit(server, worker):
+    """Drop the Prometheus samples of workers that have exited."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -2,10 +2,16 @@
 Serializers for Rental API.
 """
 from rest_framework import serializers
+from book.serializers import BookSummarySerializer
+from core.fieldsets import SparseFieldsetMixin
+from core.instrumentation import TimedSerializerMixin
 from core.models import Rental
+from user.serializers import UserPublicSerializer
 
 
-class RentalSerializer(serializers.ModelSerializer):
+class RentalSerializer(
+        SparseFieldsetMixin, TimedSerializerMixin,
+        serializers.ModelSerializer):
     """Serializer for Rental objects."""
 
     class Meta:
@@ -15,3 +21,9 @@ class RentalSerializer(serializers.ModelSerializer):
             'start_date', 'end_date', 'message'
         ]
         read_only_fields = ['id', 'renter', 'status', 'request_date']
+        # The book's owner is the counterparty of the renter.
+        expandable_fields = {
+            'book': BookSummarySerializer,
+            'renter': UserPublicSerializer,
+            'owner': (UserPublicSerializer, {'source': 'book.owner'}),
+        }
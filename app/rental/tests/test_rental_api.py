@@ -2,7 +2,7 @@
 Tests for the Rental API with JWT authentication.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -48,7 +48,7 @@ def create_rental(user, book, **params):
     defaults = {
         'start_date': date.today(),
         'end_date': date.today() + timedelta(days=7),
-        'status': 'ongoing'
+        'status': 'pending'
     }
     defaults.update(params)
     return Rental.objects.create(renter=user, book=book, **defaults)
@@ -121,6 +121,74 @@ class PrivateRentalApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_expand_my_rentals(self):
+        """Test embedding the book, renter and owner in one query"""
+        owner = create_user(
+            email='owner@example.com', password='testpass123',
+            first_name='Owner')
+        for i in range(3):
+            rental = create_rental(
+                user=self.user, book=create_book(owner, title=f'Book {i}'))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                MY_RENTALS_URL, {'expand': 'book,renter,owner'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Expanding does not paginate; only `?limit=` does.
+        self.assertEqual(len(res.data), 3)
+        self.assertNotIn('Link', res)
+        first = res.data[0]
+        self.assertEqual(first['id'], rental.id)
+        self.assertEqual(first['book'], {
+            'id': rental.book.id, 'title': 'Book 2', 'author': 'Sample Author',
+            'image': None,
+        })
+        self.assertEqual(first['renter']['email'], self.user.email)
+        self.assertEqual(first['owner'], {
+            'id': owner.id, 'email': owner.email,
+            'first_name': 'Owner', 'last_name': '',
+        })
+
+    @override_settings(OPT_IN_PAGE_SIZE=2, OPT_IN_MAX_PAGE_SIZE=2)
+    def test_expand_incoming_rentals_paginated(self):
+        """Test `?limit=` pages expanded lists with a bounded size"""
+        renter = create_user(email='renter@example.com', password='pass123')
+        for i in range(3):
+            create_rental(user=renter, book=create_book(self.user))
+
+        res = self.client.get(RENTAL_URL, {'expand': 'book', 'limit': 50})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+        self.assertEqual(res.data['results'][0]['renter'], renter.id)
+        self.assertEqual(
+            res.data['results'][0]['book']['title'], 'Sample Book')
+
+    @override_settings(OPT_IN_MAX_PAGE_SIZE=2)
+    def test_expand_capped_without_limit(self):
+        """Test expanded arrays are cut at the maximum page size"""
+        for i in range(3):
+            create_rental(
+                user=self.user, book=create_book(self.user, title=f'B {i}'))
+
+        res = self.client.get(MY_RENTALS_URL, {'expand': 'book'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data[0]['book']['title'], 'B 2')
+        self.assertIn('limit=2', res['Link'])
+        self.assertIn('offset=2', res['Link'])
+        self.assertTrue(res['Link'].endswith('; rel="next"'))
+
+        res = self.client.get(
+            MY_RENTALS_URL, {'expand': 'book', 'limit': 2, 'offset': 2})
+
+        self.assertEqual(
+            [r['book']['title'] for r in res.data['results']], ['B 0'])
+
     def test_create_rental(self):
         """Test creating a rental"""
         owner = create_user(
@@ -142,6 +210,37 @@ class PrivateRentalApiTests(TestCase):
         self.assertEqual(rental.book, book)
         self.assertEqual(rental.renter, self.user)
 
+    def test_create_duplicate_pending_rental_conflict(self):
+        """Test a second pending request for the same book returns 409"""
+        owner = create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        book = create_book(user=owner)
+        payload = {'book': book.id}
+
+        res1 = self.client.post(RENTAL_URL, payload)
+        res2 = self.client.post(RENTAL_URL, payload)
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            Rental.objects.filter(renter=self.user, book=book).count(), 1
+        )
+
+    def test_create_rental_after_decline(self):
+        """Test a new request is allowed once the previous one is closed"""
+        owner = create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        book = create_book(user=owner)
+        create_rental(user=self.user, book=book, status='declined')
+
+        res = self.client.post(RENTAL_URL, {'book': book.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
     def test_partial_update_rental(self):
         """Test updating a rental with patch"""
         book = create_book(user=self.user)
@@ -154,6 +253,18 @@ class PrivateRentalApiTests(TestCase):
         self.assertEqual(rental.status, 'returned')
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_return_overdue_rental(self):
+        """Test an overdue rental can still be returned"""
+        book = create_book(user=self.user)
+        rental = create_rental(user=self.user, book=book, status='overdue')
+
+        url = reverse('rental:rental-mark-as-returned', args=[rental.id])
+        res = self.client.post(url)
+
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, 'returned')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_rental(self):
         """Test deleting a rental"""
         book = create_book(user=self.user)
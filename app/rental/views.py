@@ -1,30 +1,55 @@
 """
 Views for Rental API.
 """
+from django.db import IntegrityError, transaction
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core import events
+from core.fieldsets import SparseFieldsetViewMixin
+from core.idempotency import idempotent
+from core.metrics import RENTAL_TRANSITIONS
+from core.pagination import OptInPagination
+from core.profiling import ProfiledViewMixin
+from core.tracing import TracedViewMixin, traced
+from core.values import ValuesSerializerViewMixin
 from core.models import Rental
 from rental import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import APIException, ValidationError
 
 
-class RentalViewSet(viewsets.ModelViewSet):
+class DuplicateRentalRequest(APIException):
+    """A pending request for this book already exists for the renter."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'You already have a pending request for this book.'
+    default_code = 'duplicate_request'
+
+
+class RentalViewSet(
+        SparseFieldsetViewMixin, ValuesSerializerViewMixin, TracedViewMixin,
+        ProfiledViewMixin, viewsets.ModelViewSet):
     """Manage rentals in the database."""
     serializer_class = serializers.RentalSerializer
     queryset = Rental.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInPagination
 
+    @traced('queryset')
     def get_queryset(self):
         """Return rentals for books that I own (incoming requests)."""
         return self.queryset.filter(
             book__owner=self.request.user
         ).order_by('-request_date')
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Create a rental, replaying the response for a repeated key."""
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Create a new rental request."""
         book = serializer.validated_data['book']
-        if book.owner == self.request.user:
+        if book.owner_id == self.request.user.id:
             raise ValidationError(
                 "You cannot rent your own book."
             )
@@ -32,14 +57,26 @@ class RentalViewSet(viewsets.ModelViewSet):
             raise ValidationError(
                 "This book is currently not available."
             )
-        serializer.save(renter=self.request.user)
+        # Duplicates are rejected by the rental_one_pending_per_renter
+        # constraint rather than a pre-check query.
+        try:
+            with transaction.atomic():
+                serializer.save(renter=self.request.user)
+        except IntegrityError:
+            raise DuplicateRentalRequest()
+        RENTAL_TRANSITIONS.labels('pending').inc()
+        events.publish(serializer.instance, book.owner_id)
 
     @action(methods=['GET'], detail=False, url_path='mine')
     def mine(self, request):
         """Retrieve rentals I have requested (as renter)."""
-        rentals = self.queryset.filter(
+        rentals = self.filter_queryset(self.queryset.filter(
             renter=request.user
-        ).order_by('-request_date')
+        ).order_by('-request_date'))
+        page = self.paginate_queryset(rentals)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(rentals, many=True)
         return Response(serializer.data)
 
@@ -49,6 +86,7 @@ class RentalViewSet(viewsets.ModelViewSet):
         url_path='accept',
         serializer_class=None
     )
+    @idempotent
     def accept(self, request, pk=None):
         """Accept a rental request (by owner only)."""
         rental = self.get_object()
@@ -64,6 +102,8 @@ class RentalViewSet(viewsets.ModelViewSet):
         rental.book.is_available = False
         rental.book.save()
         rental.save()
+        RENTAL_TRANSITIONS.labels('accepted').inc()
+        events.publish(rental, rental.book.owner_id)
         return Response({'status': 'Rental accepted.'})
 
     @action(
@@ -85,6 +125,8 @@ class RentalViewSet(viewsets.ModelViewSet):
 
         rental.status = 'declined'
         rental.save()
+        RENTAL_TRANSITIONS.labels('declined').inc()
+        events.publish(rental, rental.book.owner_id)
         return Response({'status': 'Rental declined.'})
 
     @action(
@@ -93,6 +135,7 @@ class RentalViewSet(viewsets.ModelViewSet):
         url_path='return',
         serializer_class=None
     )
+    @idempotent
     def mark_as_returned(self, request, pk=None):
         """Mark a rental as returned."""
         rental = self.get_object()
@@ -100,7 +143,7 @@ class RentalViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Not authorized.'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        if rental.status != 'accepted':
+        if rental.status not in ('accepted', 'overdue'):
             return Response({'error': 'Rental is not active.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
@@ -108,6 +151,8 @@ class RentalViewSet(viewsets.ModelViewSet):
         rental.book.is_available = True
         rental.book.save()
         rental.save()
+        RENTAL_TRANSITIONS.labels('returned').inc()
+        events.publish(rental, rental.book.owner_id)
         return Response(
             {'status': 'Rental marked as returned.'},
             status=status.HTTP_200_OK
@@ -5,8 +5,11 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from core.fieldsets import SparseFieldsetMixin
+from core.instrumentation import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the users objects"""
 
     class Meta:
@@ -61,7 +64,9 @@ class CustomAuthTokenSerializer(TokenObtainPairSerializer):
         return data
 
 
-class UserPublicSerializer(serializers.ModelSerializer):
+class UserPublicSerializer(
+        SparseFieldsetMixin, TimedSerializerMixin,
+        serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ['id', 'email', 'first_name', 'last_name']
@@ -6,18 +6,19 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView as BaseTokenRefreshView,
 )
+from core.tracing import TracedViewMixin
 from user.serializers import (
     UserSerializer,
     CustomAuthTokenSerializer,
 )
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(TracedViewMixin, generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
 
 
-class CreateTokenView(TokenObtainPairView):
+class CreateTokenView(TracedViewMixin, TokenObtainPairView):
     """Create a new JWT token for user"""
     serializer_class = CustomAuthTokenSerializer
 
@@ -27,7 +28,7 @@ class CustomTokenRefreshView(BaseTokenRefreshView):
     pass
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(TracedViewMixin, generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -2,7 +2,24 @@
 
 set -e
 
-python manage.py wait_for_db
-python manage.py migrate
+# Reported as time-to-first-request by gunicorn.conf.py.
+export BOOT_STARTED_AT=$(date +%s)
 
-gunicorn app.wsgi:application --bind 0.0.0.0:$PORT
+# Shared directory for per-worker Prometheus samples.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# One process waits for the database and migrates only if needed.
+python manage.py wait_for_db --migrate
+# Cache tables, e.g. the replica pins shared by every host.
+python manage.py createcachetable
+
+# Render the OpenAPI schema once per code version rather than per worker.
+if [ -n "$APP_VERSION" ]; then
+    python manage.py build_schema
+fi
+
+# App (WSGI or ASGI), bind address, worker model and sizing: see
+# gunicorn.conf.py.
+gunicorn